@@ -0,0 +1,499 @@
+"""
+Sequential (recalculate = True) attacks that avoid recomputing the
+centrality of the whole network after every removal. The removal order is
+computed here and the curve is replayed by reverse union-find
+(robustness_engine.curve), so the results are comparable with
+robustness_analysis.py.
+
+Usage: python adaptive_attacks.py <infile> [k] [seed]
+
+reports the deviation of the curves of the fast attacks (sampled
+betweenness with k pivots, CSR BFS closeness, warm-started eigenvector,
+incremental degree) from the exact sequential attacks.
+"""
+
+import heapq, math, multiprocessing, random, sys, time
+import networkx, numpy, scipy.sparse
+
+import robustness_engine
+from robustness_engine import Network, curve
+
+
+##############################################
+################ BETWEENNESS #################
+##############################################
+
+def pivots_for_error(n, epsilon, delta = 0.1):
+    """
+    Number of pivots so that every sampled (normalized) betweenness is
+    within epsilon of the exact value with probability 1 - delta
+    (Hoeffding bound with a union bound over the n nodes). Capped at n,
+    where sampling becomes exact Brandes.
+    """
+
+    return min(n, int(math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))))
+
+
+def _betweenness(g, k, rng):
+    """
+    Unnormalized betweenness of g, with k sampled pivots (exact if k is
+    None or not smaller than the number of nodes).
+    """
+
+    if k is not None and k >= len(g):
+        k = None
+    return networkx.betweenness_centrality(g, k = k, normalized = False, seed = rng)
+
+
+class _MaxQueue:
+    """
+    Max-priority queue over node labels with lazy invalidation: updating
+    a value pushes a new entry, stale entries are skipped when popped.
+    Ties go to the node that comes first in the graph, as in the sorted
+    lists of robustness_analysis.py.
+    """
+
+    def __init__(self, values, position):
+        self.value = dict(values)
+        self.position = position
+        self.heap = [(-value, position[label], label) for label, value in self.value.items()]
+        heapq.heapify(self.heap)
+
+    def update(self, label, value):
+        self.value[label] = value
+        heapq.heappush(self.heap, (-value, self.position[label], label))
+
+    def pop(self):
+        while True:
+            value, _, label = heapq.heappop(self.heap)
+            if self.value.get(label) == -value:
+                del self.value[label]
+                return label
+
+
+def betweenness_order(g, k = None, seed = None, incremental = True, removals = None):
+    """
+    Removal order (labels) of the sequential betweenness attack on g (which
+    is modified), using k sampled pivots per betweenness computation (exact
+    if None). With incremental, only the component that contained the last
+    removed node is recomputed: shortest paths, hence betweenness, of the
+    other components are not affected by the removal. Values are kept
+    unnormalized, which leaves the ranking unchanged.
+    """
+
+    rng = random.Random(seed)
+    n = len(g)
+    if removals is None:
+        removals = n - 1
+    position = {label: i for i, label in enumerate(g.nodes())}
+    queue = _MaxQueue(_betweenness(g, k, rng), position)
+    undirected = g.to_undirected(as_view = True) if g.is_directed() else g
+
+    order = []
+    for i in range(1, removals + 1):
+        v = queue.pop()
+        order.append(v)
+        region = networkx.node_connected_component(undirected, v) if incremental else None
+        g.remove_node(v)
+        if i == removals:
+            break
+        if incremental:
+            region.discard(v)
+            for component in networkx.connected_components(undirected.subgraph(region)):
+                if len(component) <= 2:
+                    values = dict.fromkeys(component, 0.0)
+                else:
+                    # A copy is much faster to traverse than a subgraph view
+                    values = _betweenness(g.subgraph(component).copy(), k, rng)
+                for label, value in values.items():
+                    queue.update(label, value)
+        else:
+            for label, value in _betweenness(g, k, rng).items():
+                queue.update(label, value)
+
+    return order + sorted(queue.value, key = position.get)
+
+
+def betweenness(infile, k = None, epsilon = None, delta = 0.1, seed = None, incremental = True):
+    """
+    Sequential betweenness attack on the network in infile with sampled
+    (k pivots, or enough pivots for error epsilon, see pivots_for_error)
+    and/or incremental betweenness. Returns the fraction of nodes removed,
+    the fractional sizes of the largest component and the vulnerability,
+    as robustness_analysis.betweenness(infile, True).
+    """
+
+    g = networkx.read_gml(infile)
+    network = Network.from_networkx(g)
+    if k is None and epsilon is not None:
+        k = pivots_for_error(network.n, epsilon, delta)
+    order = betweenness_order(g, k, seed, incremental)
+    return curve(network, [network.index[label] for label in order])
+
+
+##############################################
+################# CLOSENESS ##################
+##############################################
+
+# Shortest paths structure shared by the pool workers (set by _init)
+_paths = None
+
+
+def _init(paths):
+    global _paths
+    _paths = paths
+
+
+def _neighbours(indptr, indices, frontier):
+    """
+    Concatenated neighbour lists of the nodes in frontier.
+    """
+
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = counts.sum()
+    if total == 0:
+        return indices[:0]
+    offsets = numpy.repeat(starts - numpy.cumsum(counts) + counts, counts)
+    return indices[offsets + numpy.arange(total)]
+
+
+def _paths_matrix(network):
+    """
+    Sparse matrix of the moves of the closeness BFS, which follows edges
+    backwards (distances to the source): entry (v, u) is 1 when v -> u is
+    an edge, so that its product with a frontier gives the next frontier.
+    """
+
+    n = network.n
+    if network.directed:
+        rows, cols = network.sources, network.targets
+    else:
+        rows = numpy.repeat(numpy.arange(n), numpy.diff(network.indptr))
+        cols = network.indices
+    keep = rows != cols
+    matrix = scipy.sparse.csr_matrix((numpy.ones(keep.sum(), dtype = numpy.int32),
+                                      (rows[keep], cols[keep])), shape = (n, n))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def _closeness_values(nodes, sources, harmonic = False, paths = None, batch = 64):
+    """
+    Closeness (r^2 / total distance, which ranks as the Wasserman-Faust
+    closeness of networkx for a given number of nodes) or harmonic
+    closeness of the nodes sources, over incoming shortest paths within
+    nodes (sorted node ids, a union of components containing sources).
+    Level synchronous BFS from batch sources at a time: the frontiers are
+    the columns of a NumPy array, advanced by a sparse product.
+    """
+
+    paths = _paths if paths is None else paths
+    nodes = numpy.asarray(nodes)
+    sub = paths[nodes][:, nodes]
+    local = numpy.searchsorted(nodes, sources)
+    values = []
+    for start in range(0, len(local), batch):
+        cols = local[start:start + batch]
+        k = len(cols)
+        frontier = numpy.zeros((len(nodes), k), dtype = numpy.int32)
+        frontier[cols, numpy.arange(k)] = 1
+        seen = frontier.astype(bool)
+        reached = numpy.zeros(k, dtype = numpy.int64)
+        total = numpy.zeros(k, dtype = numpy.int64)
+        inverse = numpy.zeros(k)
+        d = 0
+        while True:
+            d += 1
+            new = (sub @ frontier > 0) & ~seen
+            counts = new.sum(axis = 0)
+            if not counts.any():
+                break
+            seen |= new
+            reached += counts
+            total += d * counts
+            inverse += counts / d
+            frontier = new.astype(numpy.int32)
+        if harmonic:
+            values.extend(inverse.tolist())
+        else:
+            values.extend(numpy.where(total > 0, reached * reached / numpy.maximum(total, 1),
+                                      0.0).tolist())
+    return values
+
+
+def closeness_order(network, harmonic = False, recalculate = True, removals = None,
+                    workers = 1, chunk = 64):
+    """
+    Removal order (node ids) of the closeness (or harmonic closeness)
+    attack on network. Closeness is computed by BFS over the CSR matrix of
+    incoming edges (the distances used by networkx.closeness_centrality and
+    networkx.harmonic_centrality), with the sources split in chunks of
+    chunk over a pool of workers processes when workers > 1. With recalculate,
+    only the (weakly connected) component that contained the last removed
+    node is recomputed: distances in the other components are unchanged,
+    and the Wasserman-Faust factor 1 / (n - 1) is common to all nodes, so
+    it is left out of the ranking.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    paths = _paths_matrix(network)
+    alive = numpy.ones(n, dtype = bool)
+    pool = multiprocessing.Pool(workers, initializer = _init, initargs = (paths,)) \
+        if workers > 1 else None
+
+    def compute(nodes):
+        if pool is None or len(nodes) <= chunk:
+            return _closeness_values(nodes, nodes, harmonic, paths)
+        chunks = [nodes[i:i + chunk] for i in range(0, len(nodes), chunk)]
+        results = pool.starmap(_closeness_values, [(nodes, c, harmonic) for c in chunks])
+        return [value for values in results for value in values]
+
+    try:
+        queue = _MaxQueue(zip(range(n), compute(numpy.arange(n))), range(n))
+        if not recalculate:
+            return sorted(range(n), key = lambda v: (-queue.value[v], v))
+
+        seen = numpy.zeros(n, dtype = bool)
+        order = []
+        for i in range(1, removals + 1):
+            v = queue.pop()
+            order.append(v)
+            alive[v] = False
+            if i == removals:
+                break
+            # Rest of the component of v (undirected BFS over the CSR)
+            seen[:] = ~alive
+            frontier, region = numpy.array([v]), []
+            while frontier.size:
+                nb = _neighbours(network.indptr, network.indices, frontier)
+                frontier = numpy.unique(nb[~seen[nb]])
+                seen[frontier] = True
+                region.append(frontier)
+            region = numpy.concatenate(region)
+            if region.size:
+                region.sort()
+                for u, value in zip(region.tolist(), compute(region)):
+                    queue.update(u, value)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return order + sorted(queue.value)
+
+
+def closeness(infile, harmonic = False, recalculate = True, workers = 1):
+    """
+    Closeness (or harmonic closeness) attack on the network in infile with
+    the CSR BFS of closeness_order. Returns the fraction of nodes removed,
+    the fractional sizes of the largest component and the vulnerability,
+    as robustness_analysis.closeness(infile, recalculate) when harmonic is
+    False; only the order of tied nodes may differ.
+    """
+
+    network = robustness_engine.load_network(infile)
+    return curve(network, closeness_order(network, harmonic, recalculate, workers = workers))
+
+
+##############################################
+################ EIGENVECTOR #################
+##############################################
+
+def eigenvector_order(network, recalculate = True, warm_start = True, removals = None):
+    """
+    Removal order (node ids) of the eigenvector attack on network, with
+    the centrality computed by sparse power iteration
+    (robustness_engine.eigenvector_centrality). With recalculate, the
+    centrality is recomputed after each removal from the previous vector
+    restricted to the surviving nodes (warm_start), which is close to the
+    new one, so a few iterations are enough. This is the order of the
+    engine's 'eigenvector' strategy; warm_start = False restarts every
+    recalculation from scratch, for comparison.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    if not recalculate:
+        return robustness_engine.attack_order(network, 'eigenvector', False)
+    order = list(robustness_engine.eigenvector_removals(network, removals, warm_start))
+    removed = set(order)
+    return order + [v for v in range(n) if v not in removed]
+
+
+def eigenvector(infile, recalculate = True, warm_start = True):
+    """
+    Eigenvector attack on the network in infile with warm-started sparse
+    power iteration. Returns the fraction of nodes removed, the fractional
+    sizes of the largest component and the vulnerability, the same as
+    robustness_engine.attack(network, 'eigenvector', recalculate) and
+    robustness_analysis.eigenvector. Before those used this solver, they
+    took igraph's eigenvector_centrality, whose output is not always a
+    converged eigenvector (residual 0.87 on final_network_MAIN.gml) and
+    whose ties depend on float noise: the curves differ from that version.
+    """
+
+    network = robustness_engine.load_network(infile)
+    return curve(network, eigenvector_order(network, recalculate, warm_start))
+
+
+##############################################
+################### DEGREE ###################
+##############################################
+
+def degree_order(network, removals = None):
+    """
+    Removal order (node ids) of the sequential degree attack on network:
+    degrees are updated incrementally, removing a node only decrements
+    those of its neighbours, instead of recomputing and sorting them all.
+    Degrees count every edge end (in + out degree for directed networks),
+    as networkx.degree_centrality. Nodes are grouped by degree, each group
+    a heap of node ids, so ties go to the first node, as in the
+    recompute-and-sort attack of robustness_analysis.degree; a node moving
+    down leaves a stale entry in its old heap, skipped when reached.
+    O((n + m) log n): a bucket queue without the heaps would be O(n + m),
+    but would break ties in insertion order.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+
+    # Incidence lists with one entry per edge end
+    ends = numpy.concatenate((network.sources, network.targets))
+    others = numpy.concatenate((network.targets, network.sources))
+    sort = numpy.argsort(ends, kind = 'stable')
+    indptr = numpy.zeros(n + 1, dtype = numpy.int64)
+    numpy.cumsum(numpy.bincount(ends, minlength = n), out = indptr[1:])
+    indptr, others = indptr.tolist(), others[sort].tolist()
+    degree = [indptr[v + 1] - indptr[v] for v in range(n)]
+
+    top = max(degree, default = 0)
+    # Node ids are added in increasing order: every bucket starts as a heap
+    buckets = [[] for _ in range(top + 1)]
+    for v in range(n):
+        buckets[degree[v]].append(v)
+
+    removed = [False] * n
+    order = []
+    for _ in range(removals):
+        while True:
+            bucket = buckets[top]
+            if not bucket:
+                top -= 1
+                continue
+            v = heapq.heappop(bucket)
+            if not removed[v] and degree[v] == top:
+                break
+        removed[v] = True
+        order.append(v)
+
+        for u in others[indptr[v]:indptr[v + 1]]:
+            if removed[u]:
+                continue
+            degree[u] -= 1
+            heapq.heappush(buckets[degree[u]], u)
+
+    return order + [v for v in range(n) if not removed[v]]
+
+
+def degree(infile):
+    """
+    Sequential degree attack on the network in infile with incremental
+    degrees (degree_order). Returns the fraction of nodes removed, the
+    fractional sizes of the largest component and the vulnerability, as
+    robustness_analysis.degree(infile, True) (n - 2 removals).
+    """
+
+    network = Network.from_networkx(networkx.read_gml(infile))
+    removals = network.n - 2
+    return curve(network, degree_order(network, removals), removals)
+
+
+def deviation(approx, exact):
+    """
+    Deviation of an approximate curve (x, y, V) from the exact one: maximum
+    and mean absolute difference of sigma, and difference of V.
+    """
+
+    dy = [abs(a - b) for a, b in zip(approx[1], exact[1])]
+    return {
+        'max_abs': max(dy),
+        'mean_abs': sum(dy) / len(dy),
+        'V_approx': approx[2],
+        'V_exact': exact[2],
+        'V_error': approx[2] - exact[2],
+    }
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 1:
+        print("python adaptive_attacks.py <infile> [k] [seed]")
+        sys.exit(0)
+
+    infile = argv[0]
+    k = int(argv[1]) if len(argv) > 1 else None
+    seed = int(argv[2]) if len(argv) > 2 else None
+
+    start = time.time()
+    exact = robustness_engine.betweenness(infile, True)
+    exact_time = time.time() - start
+    start = time.time()
+    approx = betweenness(infile, k = k, seed = seed)
+    approx_time = time.time() - start
+
+    report = deviation(approx, exact)
+    print(f"Betweenness (k = {k}): {approx_time:.2f}s vs {exact_time:.2f}s exact")
+    print(f"  max |d sigma| = {report['max_abs']:.4f}, mean |d sigma| = {report['mean_abs']:.4f}")
+    print(f"  V = {report['V_approx']:.4f} vs {report['V_exact']:.4f} exact")
+
+    start = time.time()
+    exact = robustness_engine.closeness(infile, True)
+    exact_time = time.time() - start
+    start = time.time()
+    approx = closeness(infile)
+    approx_time = time.time() - start
+
+    report = deviation(approx, exact)
+    print(f"Closeness (CSR BFS): {approx_time:.2f}s vs {exact_time:.2f}s exact")
+    print(f"  max |d sigma| = {report['max_abs']:.4f}, mean |d sigma| = {report['mean_abs']:.4f}")
+    print(f"  V = {report['V_approx']:.4f} vs {report['V_exact']:.4f} exact")
+
+    start = time.time()
+    exact = eigenvector(infile, warm_start = False)
+    exact_time = time.time() - start
+    start = time.time()
+    approx = eigenvector(infile)
+    approx_time = time.time() - start
+
+    report = deviation(approx, exact)
+    print(f"Eigenvector (warm power iteration): {approx_time:.2f}s vs {exact_time:.2f}s cold start")
+    print(f"  max |d sigma| = {report['max_abs']:.4f}, mean |d sigma| = {report['mean_abs']:.4f}")
+    print(f"  V = {report['V_approx']:.4f} vs {report['V_exact']:.4f} cold start")
+
+    start = time.time()
+    exact = robustness_engine.degree(infile, True)
+    exact_time = time.time() - start
+    start = time.time()
+    approx = degree(infile)
+    approx_time = time.time() - start
+
+    report = deviation(approx, exact)
+    print(f"Degree (incremental): {approx_time:.2f}s vs {exact_time:.2f}s exact")
+    print(f"  max |d sigma| = {report['max_abs']:.4f}, mean |d sigma| = {report['mean_abs']:.4f}")
+    print(f"  V = {report['V_approx']:.4f} vs {report['V_exact']:.4f} exact")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python adaptive_attacks.py final_network_MAIN.gml 20 42
+# Windows: py adaptive_attacks.py final_network_MAIN.gml 20 42
@@ -0,0 +1,143 @@
+"""
+Batch robustness comparison of the exported network variants
+(final_network.gml, final_network_MAIN.gml,
+final_network_MAIN_OnlyWarehouses.gml, final_network_nobackup.gml, ...),
+instead of one robustness_analysis.py run per file.
+
+Every (network, strategy) pair is an independent task of a process pool.
+Each curve is stored with robustness_results.py as one NPZ file in
+results_dir (robustness_results/ by default), named after the SHA-256 of
+the network file content and of the attack parameters (strategy,
+recalculate and the random seed), so unchanged networks are not
+recomputed when the comparison is run again. The output is a table
+(CSV) with the V of every strategy per network and one figure with the
+curves of all networks.
+
+Usage: python batch_robustness.py <pattern> <table.csv> <figure.pdf> [recalculate] [workers] [results_dir]
+
+where pattern is a glob such as "final_network*.gml" (quoted).
+"""
+
+import glob, math, multiprocessing, os, sys
+import pylab
+import pandas as pd
+
+import robustness_engine
+from robustness_results import COLORS, RESULTS_DIR, file_hash, load_results, result_path, save_results
+
+STRATEGIES = ['degree', 'betweenness', 'closeness', 'random']
+
+# Networks loaded by a pool worker, by path
+_networks = {}
+
+
+def _compute(path, strategy, recalculate, seed):
+    if path not in _networks:
+        _networks[path] = robustness_engine.load_network(path)
+    return robustness_engine.attack(_networks[path], strategy, recalculate, seed)
+
+
+def run_batch(paths, strategies = STRATEGIES, recalculate = False, seed = 0, workers = None,
+              results_dir = RESULTS_DIR):
+    """
+    Curves of every strategy on every network of paths, computed in
+    parallel across files and strategies, or read from the stored results.
+    Returns {path: {strategy: (x, y, V)}}.
+    """
+
+    digests = {path: file_hash(path) for path in paths}
+    results = {path: {} for path in paths}
+    tasks = []
+    for path in paths:
+        for strategy in strategies:
+            stored = result_path(digests[path], results_dir, strategies = [strategy],
+                                 recalculate = recalculate, seed = seed)
+            if os.path.exists(stored):
+                results[path][strategy] = load_results(stored)[0][strategy]
+            else:
+                tasks.append((path, strategy, recalculate, seed, stored))
+
+    if tasks:
+        if workers == 1:
+            curves = [_compute(*task[:4]) for task in tasks]
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                curves = pool.starmap(_compute, [task[:4] for task in tasks])
+        for (path, strategy, _, _, stored), curve in zip(tasks, curves):
+            results[path][strategy] = curve
+            save_results(stored, {strategy: curve}, infile = path,
+                         recalculate = recalculate, seed = seed)
+    return results
+
+
+def comparison_table(results):
+    """
+    One row per network with its size and the V of every strategy.
+    """
+
+    rows = []
+    for path, curves in results.items():
+        row = {'network': os.path.basename(path)}
+        for strategy, (x, y, V) in curves.items():
+            row['n'] = len(x) + robustness_engine.REMOVALS_OFFSET.get(strategy, 1) - 1
+            row[f'V_{strategy}'] = V
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def plot_comparison(results, outfile):
+    """
+    Curves of all strategies, one panel per network.
+    """
+
+    cols = min(len(results), 3)
+    rows = int(math.ceil(len(results) / cols))
+    fig, axes = pylab.subplots(rows, cols, figsize = (4.5 * cols, 4 * rows), dpi = 300,
+                               squeeze = False, sharey = True)
+    for k, (path, curves) in enumerate(results.items()):
+        ax = axes[k // cols][k % cols]
+        for strategy, (x, y, V) in curves.items():
+            ax.plot(x, y, COLORS[strategy] + "-", alpha = 0.6, linewidth = 2.0,
+                    label = "%s ($V = %4.3f$)" %(strategy.capitalize(), V))
+        ax.set_title(os.path.basename(path), fontsize = 9)
+        ax.set_xlabel(r"Fraction of vertices removed ($\rho$)")
+        ax.legend(loc = "upper right", fontsize = 7, shadow = False)
+    for ax in axes[:, 0]:
+        ax.set_ylabel(r"Fractional size of largest component ($\sigma$)")
+    for k in range(len(results), rows * cols):
+        axes[k // cols][k % cols].axis('off')
+    fig.tight_layout()
+    fig.savefig(outfile, format = "pdf")
+    pylab.close(fig)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 3:
+        print("python batch_robustness.py <pattern> <table.csv> <figure.pdf> [recalculate] [workers] [results_dir]")
+        sys.exit(0)
+
+    pattern, table_file, figure_file = argv[0], argv[1], argv[2]
+    recalculate = len(argv) > 3 and argv[3] == "True"
+    workers = int(argv[4]) if len(argv) > 4 else None
+    results_dir = argv[5] if len(argv) > 5 else RESULTS_DIR
+
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"No network matches {pattern}")
+        sys.exit(1)
+    results = run_batch(paths, STRATEGIES, recalculate, workers = workers, results_dir = results_dir)
+    table = comparison_table(results)
+    table.to_csv(table_file, index = False)
+    print(table.to_string(index = False))
+    plot_comparison(results, figure_file)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python batch_robustness.py "final_network*.gml" robustness_comparison.csv robustness_comparison.pdf True
+# Windows: py batch_robustness.py "final_network*.gml" robustness_comparison.csv robustness_comparison.pdf True
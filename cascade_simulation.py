@@ -0,0 +1,188 @@
+"""
+Capacity-overload cascades on the solution network of main.py. When an
+opened warehouse fails, the demand of the communities it serves shifts to
+its backup facilities (warehouse -> backup links), preferring those linked
+to the community (backup -> community links). A facility whose load then
+exceeds its capacity fails in turn and sheds its own demand, and so on.
+Demand that finds no surviving backup is lost.
+
+Capacities come from data_reference.txt: a warehouse holds pre-positioned
+supplies for 56,000 people. A facility whose initial demand is already
+larger gets (1 + tolerance) times that demand, as in the Motter-Lai
+cascade model, so the intact network is stable.
+
+The cascade runs on an event queue of (step, facility) failures. Only the
+facilities that received demand from a failure are re-evaluated, so a
+scenario costs O(affected links) and thousands of initial-failure
+scenarios run in a fraction of a second.
+
+Usage: python cascade_simulation.py <infile> [scenarios] [k] [seed] [tolerance] [data_dir]
+
+runs every single-facility failure, then scenarios random sets of k
+initial failures, and reports the cascades and the population served.
+"""
+
+import heapq, itertools, random, sys
+import numpy
+
+import robustness_engine
+from service_coverage import population_weights
+
+# People covered by the pre-positioned supplies of a warehouse (data_reference.txt)
+CAPACITY = 56000
+
+# Margin over the initial load of facilities that start above CAPACITY
+TOLERANCE = 0.2
+
+# Node types of the colors given by main.py
+WAREHOUSE, BACKUP, COMMUNITY = 'green', 'red', 'blue'
+
+
+class CascadeModel:
+    """
+    Facilities, demand and capacities of a solution network (a
+    robustness_engine.Network with main.py's node colors) and the weights
+    (population) of its nodes. flow[f] maps the communities served by
+    facility f to the demand it carries for them in the intact network.
+    """
+
+    def __init__(self, network, weights, capacity = CAPACITY, tolerance = TOLERANCE):
+        colors = network.colors or [None] * network.n
+        self.network = network
+        self.facilities = [v for v, color in enumerate(colors) if color in (WAREHOUSE, BACKUP)]
+        self.backups = {f: [] for f in self.facilities}
+        self.reach = {f: set() for f in self.facilities}
+        servers = {}
+        for a, b in zip(network.sources.tolist(), network.targets.tolist()):
+            if colors[a] not in (WAREHOUSE, BACKUP):
+                continue
+            if colors[b] == COMMUNITY:
+                self.reach[a].add(b)
+                if colors[a] == WAREHOUSE:
+                    servers.setdefault(b, []).append(a)
+            elif colors[a] == WAREHOUSE and colors[b] == BACKUP:
+                self.backups[a].append(b)
+
+        # Demand of every community split among its warehouses
+        self.flow = {f: {} for f in self.facilities}
+        for c, warehouses in servers.items():
+            for f in warehouses:
+                self.flow[f][c] = weights[c] / len(warehouses)
+        self.load = {f: sum(self.flow[f].values()) for f in self.facilities}
+        self.capacity = {f: max(capacity, (1 + tolerance) * self.load[f]) for f in self.facilities}
+        self.total = sum(self.load.values())
+
+    def simulate(self, initial):
+        """
+        Cascade triggered by the failure of the facilities initial (node
+        ids). Returns a dictionary with the failures as (step, node id)
+        pairs, the demand lost and the fraction of the demand still served.
+        """
+
+        flow = {f: dict(demand) for f, demand in self.flow.items()}
+        load = dict(self.load)
+        alive = dict.fromkeys(self.facilities, True)
+        queue = [(0, f) for f in initial if f in alive]
+        heapq.heapify(queue)
+        failures = []
+        lost = 0.0
+
+        while queue:
+            step, f = heapq.heappop(queue)
+            if not alive[f]:
+                continue
+            alive[f] = False
+            failures.append((step, f))
+            shed = flow[f]
+            flow[f], load[f] = {}, 0.0
+            targets = [b for b in self.backups[f] if alive[b]]
+            touched = set()
+            for c, amount in shed.items():
+                candidates = [b for b in targets if c in self.reach[b]] or targets
+                if not candidates:
+                    lost += amount
+                    continue
+                share = amount / len(candidates)
+                for b in candidates:
+                    flow[b][c] = flow[b].get(c, 0.0) + share
+                    load[b] += share
+                    touched.add(b)
+            # Only the facilities that received demand can overload
+            for b in touched:
+                if load[b] > self.capacity[b] * (1 + 1e-12):
+                    heapq.heappush(queue, (step + 1, b))
+
+        return {
+            'failures': failures,
+            'lost': lost,
+            'served': 1 - lost / self.total if self.total else 1.0,
+        }
+
+    def sweep(self, scenarios):
+        """
+        Runs every scenario (iterable of initial failure sets). Returns the
+        arrays of the number of cascading failures (beyond the initial
+        ones) and of the fraction of the demand served.
+        """
+
+        cascade, served = [], []
+        for initial in scenarios:
+            result = self.simulate(initial)
+            cascade.append(len(result['failures']) - len(set(initial)))
+            served.append(result['served'])
+        return numpy.array(cascade), numpy.array(served)
+
+
+def random_scenarios(model, count, k = 1, seed = None):
+    """
+    count random sets of k initial facility failures.
+    """
+
+    rng = random.Random(seed)
+    k = min(k, len(model.facilities))
+    return [rng.sample(model.facilities, k) for _ in range(count)]
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 1:
+        print("python cascade_simulation.py <infile> [scenarios] [k] [seed] [tolerance] [data_dir]")
+        sys.exit(0)
+
+    infile = argv[0]
+    count = int(argv[1]) if len(argv) > 1 else 1000
+    k = int(argv[2]) if len(argv) > 2 else 2
+    seed = int(argv[3]) if len(argv) > 3 else None
+    tolerance = float(argv[4]) if len(argv) > 4 else TOLERANCE
+    data_dir = argv[5] if len(argv) > 5 else 'processed_data'
+
+    network = robustness_engine.load_network(infile)
+    model = CascadeModel(network, population_weights(network, data_dir), tolerance = tolerance)
+    labels = network.labels
+
+    print("Single facility failures:")
+    for f in model.facilities:
+        result = model.simulate([f])
+        cascade = [labels[v] for _, v in result['failures'][1:]]
+        print(f"  {labels[f]}: served {result['served']:.4f}, cascade {cascade}")
+
+    cascade, served = model.sweep(random_scenarios(model, count, k, seed))
+    print(f"{count} scenarios of {k} initial failures: mean served {served.mean():.4f}, "
+          f"worst {served.min():.4f}, cascades in {(cascade > 0).mean():.2%}, "
+          f"largest cascade {cascade.max()}")
+
+    pairs = list(itertools.combinations(model.facilities, 2))
+    cascade, served = model.sweep(pairs)
+    worst = int(numpy.argmin(served))
+    print(f"All {len(pairs)} pairs: worst pair {[labels[v] for v in pairs[worst]]} "
+          f"serves {served[worst]:.4f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python cascade_simulation.py final_network_MAIN.gml 5000 2 42
+# Windows: py cascade_simulation.py final_network_MAIN.gml 5000 2 42
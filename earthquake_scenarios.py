@@ -0,0 +1,208 @@
+"""
+Spatially correlated earthquake scenarios. Random and centrality attacks
+remove nodes anywhere in the network, while an earthquake destroys what is
+close to its epicenter. Here a grid of epicenters around the network is
+swept for several magnitudes:
+
+    - every node gets the coordinates of main.py's all_locations (Pj.csv,
+      Ci.csv, Rk.csv, see geo_utils.node_coordinates);
+    - the damage at a node decays with its distance d to the epicenter,
+      exp(-d / L(M)), with a decay length L growing with the magnitude M
+      (log10 L = a M - b, after the rupture length scaling of Wells and
+      Coppersmith), and the node fails when the damage reaches threshold;
+    - the failed nodes of every epicenter are found with a k-d tree
+      (scipy.spatial.cKDTree) on 3D unit vectors, the failure radius
+      L ln(1 / threshold) becoming a chord length;
+    - the service loss, the fraction of the population (Pj.csv) no longer
+      reachable from the main warehouse 160001 (service_coverage.py), is
+      evaluated for all the epicenters of a magnitude at once, propagating
+      reachability over a sparse adjacency matrix with one row per
+      scenario.
+
+The output is a heatmap of the service loss per magnitude.
+
+Usage: python earthquake_scenarios.py <infile> <outfile> [step] [magnitudes] [data_dir]
+
+where step is the grid spacing in degrees (default 0.05) and magnitudes a
+comma separated list (default 6,6.5,7,7.5).
+"""
+
+import math, sys
+import numpy, pylab
+import scipy.sparse
+from scipy.spatial import cKDTree
+
+import robustness_engine
+from geo_utils import R, node_coordinates
+from service_coverage import MAIN_WAREHOUSE_ID, population_weights, roots_of
+
+# log10 of the decay length (km) as a M - b
+DECAY_LENGTH = (0.5, 2.0)
+
+# Damage at which a node fails
+THRESHOLD = 0.5
+
+# Margin of the epicenter grid around the nodes (degrees)
+MARGIN = 0.5
+
+MAGNITUDES = [6.0, 6.5, 7.0, 7.5]
+
+
+def decay_length(magnitude):
+    """
+    Distance (km) over which the damage decays by a factor e.
+    """
+
+    a, b = DECAY_LENGTH
+    return 10 ** (a * numpy.asarray(magnitude, dtype = float) - b)
+
+
+def failure_radius(magnitude, threshold = THRESHOLD):
+    """
+    Distance (km) within which the damage exp(-d / L) reaches threshold.
+    """
+
+    return decay_length(magnitude) * math.log(1 / threshold)
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = numpy.radians(lat), numpy.radians(lon)
+    return numpy.column_stack((numpy.cos(lat) * numpy.cos(lon),
+                               numpy.cos(lat) * numpy.sin(lon),
+                               numpy.sin(lat)))
+
+
+def epicenter_grid(lat, lon, step = 0.05, margin = MARGIN):
+    """
+    Axes (latitudes, longitudes) of a regular grid of epicenters covering
+    the points (lat, lon) with margin degrees around them.
+    """
+
+    lat, lon = lat[~numpy.isnan(lat)], lon[~numpy.isnan(lon)]
+    lats = numpy.arange(lat.min() - margin, lat.max() + margin + step / 2, step)
+    lons = numpy.arange(lon.min() - margin, lon.max() + margin + step / 2, step)
+    return lats, lons
+
+
+def failed_nodes(tree, epicenters, radius):
+    """
+    Boolean (scenarios x n) array of the nodes of tree (k-d tree of the
+    node unit vectors) within radius km of each epicenter (unit vectors).
+    """
+
+    chord = 2 * math.sin(min(radius / R, math.pi) / 2)
+    failed = numpy.zeros((len(epicenters), tree.n), dtype = bool)
+    for s, nodes in enumerate(tree.query_ball_point(epicenters, chord)):
+        failed[s, nodes] = True
+    return failed
+
+
+def service_loss(network, weights, failed, roots = (MAIN_WAREHOUSE_ID,)):
+    """
+    Fraction of the total weight (population) of network that is not
+    reachable from the roots along directed links, for every scenario (row)
+    of the boolean failed array. Reachability of all scenarios is
+    propagated together, one level per sparse product.
+    """
+
+    n = network.n
+    alive = ~failed
+    matrix = scipy.sparse.csr_matrix((numpy.ones(len(network.sources), dtype = numpy.int32),
+                                      (network.sources, network.targets)), shape = (n, n))
+    reached = numpy.zeros(failed.shape, dtype = bool)
+    reached[:, roots_of(network, roots)] = True
+    reached &= alive
+    while True:
+        step = (reached.astype(numpy.int32) @ matrix > 0) & alive & ~reached
+        if not step.any():
+            break
+        reached |= step
+    total = weights.sum() or 1.0
+    return 1 - (reached @ weights) / total
+
+
+def sweep(network, weights, lat, lon, magnitudes = MAGNITUDES, step = 0.05,
+          threshold = THRESHOLD, roots = (MAIN_WAREHOUSE_ID,)):
+    """
+    Service loss and fraction of failed nodes for every epicenter of the
+    grid around the nodes (coordinates lat, lon) and every magnitude.
+    Returns a dictionary with the grid axes, the magnitudes, and the
+    (magnitudes x latitudes x longitudes) arrays loss and failed.
+    """
+
+    known = ~numpy.isnan(lat)
+    tree = cKDTree(_unit_vectors(lat[known], lon[known]))
+    lats, lons = epicenter_grid(lat, lon, step)
+    grid_lat, grid_lon = numpy.meshgrid(lats, lons, indexing = 'ij')
+    epicenters = _unit_vectors(grid_lat.ravel(), grid_lon.ravel())
+
+    loss = numpy.empty((len(magnitudes), len(lats), len(lons)))
+    fraction = numpy.empty_like(loss)
+    for k, magnitude in enumerate(magnitudes):
+        failed = numpy.zeros((len(epicenters), network.n), dtype = bool)
+        failed[:, known] = failed_nodes(tree, epicenters, failure_radius(magnitude, threshold))
+        loss[k] = service_loss(network, weights, failed, roots).reshape(grid_lat.shape)
+        fraction[k] = failed.mean(axis = 1).reshape(grid_lat.shape)
+    return {'lat': lats, 'lon': lons, 'magnitudes': list(magnitudes),
+            'loss': loss, 'failed': fraction}
+
+
+def plot_heatmap(result, outfile, lat = None, lon = None):
+    """
+    One heatmap of the service loss per magnitude, with the nodes (lat,
+    lon) on top if given.
+    """
+
+    magnitudes = result['magnitudes']
+    cols = min(len(magnitudes), 2)
+    rows = int(math.ceil(len(magnitudes) / cols))
+    fig, axes = pylab.subplots(rows, cols, figsize = (5 * cols, 4.5 * rows), dpi = 300,
+                               squeeze = False)
+    for k, magnitude in enumerate(magnitudes):
+        ax = axes[k // cols][k % cols]
+        image = ax.pcolormesh(result['lon'], result['lat'], result['loss'][k],
+                              cmap = 'Reds', vmin = 0, vmax = 1, shading = 'nearest')
+        if lat is not None:
+            ax.plot(lon, lat, "k.", markersize = 2)
+        ax.set_title(r"$M = %.1f$" %(magnitude))
+        ax.set_xlabel("Longitude")
+        ax.set_ylabel("Latitude")
+        fig.colorbar(image, ax = ax, label = "Service loss")
+    for k in range(len(magnitudes), rows * cols):
+        axes[k // cols][k % cols].axis('off')
+    fig.tight_layout()
+    fig.savefig(outfile, format = "pdf")
+    pylab.close(fig)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python earthquake_scenarios.py <infile> <outfile> [step] [magnitudes] [data_dir]")
+        sys.exit(0)
+
+    infile, outfile = argv[0], argv[1]
+    step = float(argv[2]) if len(argv) > 2 else 0.05
+    magnitudes = [float(m) for m in argv[3].split(',')] if len(argv) > 3 else MAGNITUDES
+    data_dir = argv[4] if len(argv) > 4 else 'processed_data'
+
+    network = robustness_engine.load_network(infile)
+    weights = population_weights(network, data_dir)
+    lat, lon = node_coordinates(network.labels, data_dir)
+    result = sweep(network, weights, lat, lon, magnitudes, step)
+    scenarios = result['loss'][0].size
+    for k, magnitude in enumerate(magnitudes):
+        loss = result['loss'][k]
+        print(f"M {magnitude:.1f}: {scenarios} epicenters, mean service loss {loss.mean():.3f}, "
+              f"worst {loss.max():.3f}")
+    plot_heatmap(result, outfile, lat, lon)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python earthquake_scenarios.py final_network_MAIN.gml final_output_earthquakes.pdf 0.05 6,6.5,7,7.5
+# Windows: py earthquake_scenarios.py final_network_MAIN.gml final_output_earthquakes.pdf 0.05 6,6.5,7,7.5
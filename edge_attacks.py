@@ -0,0 +1,201 @@
+"""
+Link (edge) failures. Earthquakes in Cusco mostly cut roads and the links
+between facilities rather than destroying the facilities themselves, so
+here the nodes stay and the links of the network are removed:
+
+    random        uniformly random links
+    betweenness   links in decreasing edge betweenness (recomputed after
+                  every removal with recalculate)
+    distance      random links with a failure probability proportional to
+                  their length (long links cross more hazard), from the
+                  coordinates of Pj.csv, Ci.csv and Rk.csv
+
+Links are the undirected node pairs of the network (weak connectivity, as
+in robustness_analysis.py). Once the removal order is known, the size of
+the largest component after every removal is obtained by adding the links
+back in reverse order in a union-find (robustness_engine.UnionFind), in
+O(m alpha(n)). The curves give the fraction of links removed and the
+fractional size of the largest component, so they read as the
+sigma(rho) curves of node attacks. Since sigma does not have to fall with
+the links, V = 0.5 (1 - R / m) is used, which goes from 0 (no loss) to 0.5
+(immediate collapse), the range of the node V.
+
+Usage: python edge_attacks.py <infile> <outfile> [recalculate] [seed] [data_dir]
+"""
+
+import sys
+import igraph, numpy, pylab
+
+import robustness_engine
+from geo_utils import harversine, node_coordinates
+from robustness_engine import UnionFind, _ranking
+
+STRATEGIES = ['random', 'betweenness', 'distance']
+
+
+def links(network):
+    """
+    Undirected links (u < v) of network, as two arrays of node ids.
+    """
+
+    u = numpy.repeat(numpy.arange(network.n), numpy.diff(network.indptr))
+    v = network.indices
+    keep = u < v
+    return u[keep], v[keep]
+
+
+def largest_component_sizes(n, u, v, order):
+    """
+    Sizes of the largest component of the graph with n nodes and links
+    (u, v) after removing the first i links of order, for i = 0..m.
+    Reverse replay with union-find.
+    """
+
+    m = len(order)
+    u, v, order = numpy.asarray(u).tolist(), numpy.asarray(v).tolist(), list(order)
+    uf = UnionFind(n)
+    for node in range(n):
+        uf.add(node)
+    sizes = [0] * (m + 1)
+    sizes[m] = uf.largest
+    for i in range(m - 1, -1, -1):
+        e = order[i]
+        uf.union(u[e], v[e])
+        sizes[i] = uf.largest
+    return sizes
+
+
+def edge_curve(network, order, u, v, removals = None):
+    """
+    Robustness curve of network for the link removal order (link ids):
+    returns the fractions of links removed, the fractional sizes of the
+    largest component and V = 0.5 (1 - R / m), for removals links removed
+    (all by default).
+    """
+
+    n, m = network.n, len(order)
+    if removals is None:
+        removals = m
+    sizes = largest_component_sizes(n, u, v, order)
+    x = [0]
+    y = [sizes[0] * 1. / n]
+    R = 0.0
+    for i in range(1, removals + 1):
+        x.append(i * 1. / m)
+        R += sizes[i] * 1. / n
+        y.append(sizes[i] * 1. / n)
+    return x, y, 0.5 * (1 - R / max(m, 1))
+
+
+def random_order(m, seed = None):
+    """
+    Uniformly random removal order of m links.
+    """
+
+    return numpy.random.default_rng(seed).permutation(m).tolist()
+
+
+def betweenness_order(network, u, v, recalculate = False):
+    """
+    Removal order of the links in decreasing edge betweenness (undirected),
+    ties in link order. With recalculate, edge betweenness is recomputed on
+    the remaining links after each removal.
+    """
+
+    m = len(u)
+    ids = numpy.arange(m)
+    g = igraph.Graph(n = network.n, edges = numpy.column_stack((u, v)).tolist())
+    l = _ranking(g.edge_betweenness(directed = False), ids)
+    if not recalculate:
+        return l.tolist()
+
+    alive = numpy.ones(m, dtype = bool)
+    order = []
+    for _ in range(m):
+        e = int(l[0])
+        order.append(e)
+        alive[e] = False
+        if not alive.any():
+            break
+        remaining = numpy.flatnonzero(alive)
+        sub = g.subgraph_edges(remaining.tolist(), delete_vertices = False)
+        l = _ranking(sub.edge_betweenness(directed = False), remaining)
+    return order
+
+
+def link_lengths(network, u, v, data_dir = 'processed_data'):
+    """
+    Lengths (km) of the links, from the coordinates of their end nodes.
+    """
+
+    lat, lon = node_coordinates(network.labels, data_dir)
+    return harversine(lat[u], lon[u], lat[v], lon[v])
+
+
+def distance_order(lengths, exponent = 1.0, seed = None):
+    """
+    Random removal order where the links fail with probability
+    proportional to length ** exponent: weighted sampling without
+    replacement by exponential keys (Efraimidis-Spirakis). Links without a
+    known length get the smallest weight.
+    """
+
+    weights = numpy.nan_to_num(numpy.asarray(lengths, dtype = float), nan = 0.0) ** exponent
+    weights = numpy.maximum(weights, 1e-9)
+    keys = numpy.random.default_rng(seed).exponential(size = len(weights)) / weights
+    return numpy.argsort(keys, kind = 'stable').tolist()
+
+
+def attack(network, strategy, recalculate = False, seed = None, data_dir = 'processed_data'):
+    """
+    Link robustness curve (x, y, V) of strategy ('random', 'betweenness' or
+    'distance') on the in-memory network.
+    """
+
+    u, v = links(network)
+    if strategy == 'random':
+        order = random_order(len(u), seed)
+    elif strategy == 'betweenness':
+        order = betweenness_order(network, u, v, recalculate)
+    elif strategy == 'distance':
+        order = distance_order(link_lengths(network, u, v, data_dir), seed = seed)
+    else:
+        raise ValueError(f'Unknown strategy {strategy}')
+    return edge_curve(network, order, u, v)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python edge_attacks.py <infile> <outfile> [recalculate] [seed] [data_dir]")
+        sys.exit(0)
+
+    infile, outfile = argv[0], argv[1]
+    recalculate = len(argv) > 2 and argv[2] == "True"
+    seed = int(argv[3]) if len(argv) > 3 else None
+    data_dir = argv[4] if len(argv) > 4 else 'processed_data'
+
+    network = robustness_engine.load_network(infile)
+    curves = {strategy: attack(network, strategy, recalculate, seed, data_dir)
+              for strategy in STRATEGIES}
+
+    pylab.figure(1, dpi = 500)
+    pylab.xlabel(r"Fraction of links removed ($\rho$)")
+    pylab.ylabel(r"Fractional size of largest component ($\sigma$)")
+    for strategy, style in zip(STRATEGIES, ["k-", "g-", "m-"]):
+        x, y, V = curves[strategy]
+        pylab.plot(x, y, style, alpha = 0.6, linewidth = 2.0)
+    pylab.legend(["%s ($V = %4.3f$)" %(strategy.capitalize(), curves[strategy][2])
+                  for strategy in STRATEGIES], loc = "upper right", shadow = False)
+    pylab.savefig(outfile, format = "pdf")
+    pylab.close(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python edge_attacks.py final_network_MAIN.gml final_output_links.pdf True 42
+# Windows: py edge_attacks.py final_network_MAIN.gml final_output_links.pdf True 42
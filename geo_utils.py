@@ -0,0 +1,62 @@
+"""
+Geographic helpers shared by the data generation and analysis scripts.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Earth radius in kilometers
+R = 6371.0
+
+def harversine(lat1, lon1, lat2, lon2):
+    """
+    Compute the harversine distance between two points on the surface 
+    To create the distance matrix between candidate main warehouses and communities
+    Works elementwise on NumPy arrays, so whole matrices can be computed
+    at once through broadcasting.
+    """
+
+    # Converting degrees to radians
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+
+    # Differences in coordinates
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    # Harversine formula
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    distance = R * c
+    return distance
+
+
+def distance_matrix(lat1, lon1, lat2, lon2):
+    """
+    Harversine distances (km) between every point of the first set (rows)
+    and every point of the second set (columns).
+    """
+
+    lat1, lon1 = np.asarray(lat1, dtype = float)[:, None], np.asarray(lon1, dtype = float)[:, None]
+    lat2, lon2 = np.asarray(lat2, dtype = float)[None, :], np.asarray(lon2, dtype = float)[None, :]
+    return harversine(lat1, lon1, lat2, lon2)
+
+
+def node_coordinates(labels, data_dir = 'processed_data'):
+    """
+    Latitudes and longitudes of network nodes, as all_locations in main.py:
+    communities by district name (Pj.csv), warehouses and backup
+    facilities by id (Ci.csv, Rk.csv). Labels may be integers or strings
+    (as read from GML); unknown labels get NaN.
+    """
+
+    locations = {}
+    communities = pd.read_csv(os.path.join(data_dir, 'Pj.csv'))
+    for district, lat, lon in zip(communities['district'], communities['latitude'], communities['longitude']):
+        locations[str(district)] = (lat, lon)
+    for file in ('Ci.csv', 'Rk.csv'):
+        facilities = pd.read_csv(os.path.join(data_dir, file))
+        for wh_id, lat, lon in zip(facilities['wh_id'], facilities['latitude'], facilities['longitude']):
+            locations[str(wh_id)] = (lat, lon)
+    coordinates = np.array([locations.get(str(label), (np.nan, np.nan)) for label in labels], dtype = float)
+    return coordinates[:, 0], coordinates[:, 1]
@@ -0,0 +1,242 @@
+"""
+Ground motion intensity and facility failure probabilities. An earthquake
+is an epicenter and a magnitude; its peak ground acceleration (PGA) at a
+site follows the attenuation relationship of Joyner and Boore (1981),
+
+    log10 PGA [g] = a + b M - log10 r - c r,   r = sqrt(d^2 + h^2)
+
+with a lognormal scatter, and a facility fails with the probability given
+by its lognormal fragility curve, P(fail | PGA) = Phi(ln(PGA / median) /
+beta). Medians and dispersions per node type are illustrative values of
+the order of the HAZUS curves for the building types involved.
+
+Events are sampled with a truncated Gutenberg-Richter magnitude law and
+uniform epicenters around Cusco, and every stage works on whole (events x
+facilities) arrays, in batches of events, so tens of thousands of events
+need no per-event Python loop. The results feed:
+
+    - the robustness simulations: sampled failures of the network nodes and
+      the service loss of each event (earthquake_scenarios.service_loss);
+    - the optimization: failure_prob gives the mean failure probability of
+      every candidate warehouse, for opt_model.build_model(failure_prob =).
+
+Usage: python ground_motion.py <infile> <outfile> [events] [seed] [data_dir]
+"""
+
+import sys
+import numpy, pylab
+import pandas as pd
+from scipy.special import ndtr
+
+import robustness_engine
+from earthquake_scenarios import service_loss
+from geo_utils import distance_matrix, node_coordinates
+from service_coverage import population_weights
+
+# Joyner-Boore (1981) coefficients a, b, c and depth term h (km)
+ATTENUATION = (-1.02, 0.249, 0.00255, 7.3)
+
+# Standard deviation of log10 PGA
+SIGMA_LOG10 = 0.26
+
+# Lognormal fragility (median PGA in g, beta) per node type
+FRAGILITY = {
+    'main': (0.50, 0.6),
+    'warehouse': (0.45, 0.6),
+    'backup': (0.35, 0.6),
+    'community': (0.25, 0.7),
+}
+
+# Node type of the colors given by main.py
+COLOR_KINDS = {'yellow': 'main', 'green': 'warehouse', 'red': 'backup', 'blue': 'community'}
+
+# Sampled epicenters and magnitudes
+LAT_RANGE = (-15.0, -12.0)
+LON_RANGE = (-74.0, -70.5)
+MAGNITUDE_RANGE = (5.0, 8.0)
+B_VALUE = 1.0
+
+
+def pga(magnitude, distance):
+    """
+    Median PGA (g) at epicentral distance (km) of an earthquake of the
+    given magnitude. Broadcasts over arrays.
+    """
+
+    a, b, c, h = ATTENUATION
+    r = numpy.sqrt(numpy.asarray(distance, dtype = float) ** 2 + h ** 2)
+    return 10 ** (a + b * numpy.asarray(magnitude, dtype = float) - numpy.log10(r) - c * r)
+
+
+def pga_field(magnitude, lat, lon, lats, lons):
+    """
+    Median PGA of the event (magnitude, epicenter lat, lon) on the grid of
+    latitudes lats and longitudes lons (len(lats) x len(lons) array).
+    """
+
+    grid_lat, grid_lon = numpy.meshgrid(lats, lons, indexing = 'ij')
+    distance = distance_matrix([lat], [lon], grid_lat.ravel(), grid_lon.ravel())[0]
+    return pga(magnitude, distance).reshape(grid_lat.shape)
+
+
+def sample_events(count, seed = None, lat_range = LAT_RANGE, lon_range = LON_RANGE,
+                  magnitude_range = MAGNITUDE_RANGE, b_value = B_VALUE):
+    """
+    count events with uniform epicenters and truncated Gutenberg-Richter
+    magnitudes (inverse transform sampling). Returns a dictionary of
+    arrays lat, lon, magnitude.
+    """
+
+    rng = numpy.random.default_rng(seed)
+    low, high = magnitude_range
+    beta = b_value * numpy.log(10)
+    u = rng.random(count)
+    magnitude = low - numpy.log(1 - u * (1 - numpy.exp(-beta * (high - low)))) / beta
+    return {
+        'lat': rng.uniform(*lat_range, count),
+        'lon': rng.uniform(*lon_range, count),
+        'magnitude': magnitude,
+    }
+
+
+def facility_pga(events, lat, lon, rng = None):
+    """
+    PGA of every event (rows) at every facility (columns, coordinates lat,
+    lon). With a generator rng, the lognormal scatter is sampled,
+    otherwise the median is returned.
+    """
+
+    distance = distance_matrix(events['lat'], events['lon'], lat, lon)
+    values = pga(events['magnitude'][:, None], distance)
+    if rng is not None:
+        values *= 10 ** (SIGMA_LOG10 * rng.standard_normal(values.shape))
+    return values
+
+
+def failure_probability(values, median, beta):
+    """
+    Lognormal fragility: probability of failure at PGA values, for
+    medians and dispersions broadcasting over them.
+    """
+
+    with numpy.errstate(divide = 'ignore'):
+        return ndtr(numpy.log(values / median) / beta)
+
+
+def fragility_parameters(kinds):
+    """
+    Arrays of fragility medians and dispersions for the node types kinds.
+    """
+
+    median = numpy.array([FRAGILITY[kind][0] for kind in kinds])
+    beta = numpy.array([FRAGILITY[kind][1] for kind in kinds])
+    return median, beta
+
+
+def network_kinds(network):
+    """
+    Node types of network, from the colors of main.py (communities when
+    unknown).
+    """
+
+    colors = network.colors or [None] * network.n
+    return [COLOR_KINDS.get(color, 'community') for color in colors]
+
+
+def simulate(network, weights, events, seed = None, batch = 5000, data_dir = 'processed_data'):
+    """
+    Samples the failures of the nodes of network for every event and
+    returns the service loss (fraction of the weights, i.e. population,
+    cut from the main warehouse) and the fraction of failed nodes of each
+    event. Events are processed in batches of batch rows.
+    """
+
+    rng = numpy.random.default_rng(seed)
+    lat, lon = node_coordinates(network.labels, data_dir)
+    known = ~numpy.isnan(lat)
+    median, beta = fragility_parameters(network_kinds(network))
+    count = len(events['magnitude'])
+    loss = numpy.empty(count)
+    failed_fraction = numpy.empty(count)
+    for start in range(0, count, batch):
+        chunk = {key: value[start:start + batch] for key, value in events.items()}
+        failed = numpy.zeros((len(chunk['magnitude']), network.n), dtype = bool)
+        prob = failure_probability(facility_pga(chunk, lat[known], lon[known], rng),
+                                   median[known], beta[known])
+        failed[:, known] = rng.random(prob.shape) < prob
+        loss[start:start + batch] = service_loss(network, weights, failed)
+        failed_fraction[start:start + batch] = failed.mean(axis = 1)
+    return loss, failed_fraction
+
+
+def failure_prob(data, events, batch = 5000):
+    """
+    Mean failure probability of every candidate warehouse and backup
+    facility of data (opt_model.load_data) over the events, with the median
+    PGA. Returns {facility id: probability}, the failure_prob argument of
+    opt_model.build_model.
+    """
+
+    facilities = pd.concat([data['warehouses_df'].assign(kind = 'warehouse'),
+                            data['backup_df'].assign(kind = 'backup')], ignore_index = True)
+    median, beta = fragility_parameters(facilities['kind'])
+    total = numpy.zeros(len(facilities))
+    count = len(events['magnitude'])
+    for start in range(0, count, batch):
+        chunk = {key: value[start:start + batch] for key, value in events.items()}
+        values = facility_pga(chunk, facilities['latitude'].to_numpy(), facilities['longitude'].to_numpy())
+        total += failure_probability(values, median, beta).sum(axis = 0)
+    return dict(zip(facilities['wh_id'], total / max(count, 1)))
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python ground_motion.py <infile> <outfile> [events] [seed] [data_dir]")
+        sys.exit(0)
+
+    infile, outfile = argv[0], argv[1]
+    count = int(argv[2]) if len(argv) > 2 else 20000
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    data_dir = argv[4] if len(argv) > 4 else 'processed_data'
+
+    network = robustness_engine.load_network(infile)
+    weights = population_weights(network, data_dir)
+    events = sample_events(count, seed)
+    loss, failed = simulate(network, weights, events, seed, data_dir = data_dir)
+    print(f"{count} events: mean service loss {loss.mean():.4f}, "
+          f"95th percentile {numpy.percentile(loss, 95):.4f}, "
+          f"P(loss > 0.5) = {(loss > 0.5).mean():.4f}, mean failed nodes {failed.mean():.4f}")
+
+    # Strongest event and distribution of the losses
+    worst = int(numpy.argmax(events['magnitude']))
+    lat, lon = node_coordinates(network.labels, data_dir)
+    lats = numpy.linspace(*LAT_RANGE, 120)
+    lons = numpy.linspace(*LON_RANGE, 140)
+    field = pga_field(events['magnitude'][worst], events['lat'][worst], events['lon'][worst], lats, lons)
+
+    fig, (left, right) = pylab.subplots(1, 2, figsize = (11, 4.5), dpi = 300)
+    image = left.pcolormesh(lons, lats, field, cmap = 'YlOrRd', shading = 'nearest')
+    left.plot(lon, lat, "k.", markersize = 2)
+    left.plot(events['lon'][worst], events['lat'][worst], "b*", markersize = 10)
+    left.set_title(r"PGA of the strongest event ($M = %.2f$)" %(events['magnitude'][worst]))
+    left.set_xlabel("Longitude")
+    left.set_ylabel("Latitude")
+    fig.colorbar(image, ax = left, label = "PGA (g)")
+    right.hist(loss, bins = 50, color = "k", alpha = 0.6)
+    right.set_yscale('log')
+    right.set_xlabel("Service loss")
+    right.set_ylabel("Events")
+    fig.tight_layout()
+    fig.savefig(outfile, format = "pdf")
+    pylab.close(fig)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python ground_motion.py final_network_MAIN.gml final_output_ground_motion.pdf 20000 42
+# Windows: py ground_motion.py final_network_MAIN.gml final_output_ground_motion.pdf 20000 42
@@ -0,0 +1,87 @@
+"""
+Benchmarks the forms of the ServeIfOpen linking constraints (strong,
+aggregated, lazy, lazy_aggregated; see opt_model.LINKING_FORMS) on growing
+instances, from the 4 case study provinces up to every community in the
+data directory, and reports model size, build time and solve time.
+
+Usage: python linking_benchmark.py [data_dir] [time_limit] [outfile]
+
+where data_dir holds the processed CSVs (default processed_data), time_limit
+is the Gurobi time limit per solve in seconds (default 600) and outfile is an
+optional CSV with the results.
+"""
+
+import sys, time
+import pandas as pd
+
+from opt_model import LINKING_FORMS, load_data, build_model, optimize_model
+
+# Province sets, from the case study up to the whole region (None = all)
+INSTANCES = [
+    ('4 provinces', ['Cusco', 'Anta', 'Calca', 'Urubamba']),
+    ('8 provinces', ['Cusco', 'Anta', 'Calca', 'Urubamba', 'Paruro', 'Acomayo',
+                     'Quispicanchi', 'Paucartambo']),
+    ('all', None),
+]
+
+
+def benchmark(instances, data_dir = 'processed_data', time_limit = 600,
+              forms = LINKING_FORMS):
+    """
+    Builds and solves every instance with every linking form. Returns a
+    dataframe with one row per (instance, form).
+    """
+
+    rows = []
+    for instance, provinces in instances:
+        data = load_data(provinces, data_dir)
+        for form in forms:
+            start = time.time()
+            model, x, z, y, w = build_model(data, linking = form)
+            model.update()
+            build_time = time.time() - start
+
+            model.Params.OutputFlag = 0
+            model.Params.TimeLimit = time_limit
+            start = time.time()
+            optimize_model(model)
+            solve_time = time.time() - start
+
+            rows.append({
+                'instance': instance,
+                'communities': len(data['C']),
+                'linking': form,
+                'constraints': model.NumConstrs,
+                'lazy_added': getattr(model, '_link_added', 0),
+                'build_time': build_time,
+                'solve_time': solve_time,
+                'total_time': build_time + solve_time,
+                'nodes': model.NodeCount,
+                'status': model.Status,
+                'objective': model.ObjVal if model.SolCount > 0 else None,
+                'gap': model.MIPGap if model.SolCount > 0 else None,
+            })
+            print(f"{instance} / {form}: {rows[-1]['constraints']} constraints, "
+                  f"{rows[-1]['total_time']:.2f}s, status {model.Status}")
+            model.dispose()
+    return pd.DataFrame(rows)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    data_dir = argv[0] if len(argv) > 0 else 'processed_data'
+    time_limit = float(argv[1]) if len(argv) > 1 else 600
+    results = benchmark(INSTANCES, data_dir, time_limit)
+    print(results.to_string(index = False))
+    if len(argv) > 2:
+        results.to_csv(argv[2], index = False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python linking_benchmark.py processed_data 600 linking_benchmark.csv
+# Windows: py linking_benchmark.py processed_data 600 linking_benchmark.csv
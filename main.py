@@ -11,114 +11,63 @@ import geopandas as gpd
 from shapely.geometry import Point
 import re
 import json
+from opt_model import load_data, build_model, optimize_model, apply_tuned_params
 
 ##############################################
 ################ DATA SECTION ################ 
 ##############################################
 
-# Loading data from the CSVs
-communities_df = pd.read_csv('processed_data/Pj.csv')
+# Loading data from the CSVs (see opt_model.load_data)
 target_provinces = ['Cusco', 'Anta', 'Calca', 'Urubamba'] # Consider adding more provinces. This is good for Case Study Deliverable
-communities_df = communities_df[communities_df['province'].isin(target_provinces)] # Keeping only communities within the specific district ~ for smaller model
+data = load_data(target_provinces) # Keeping only communities within the specific district ~ for smaller model
 
-warehouses_df = pd.read_csv('processed_data/Ci.csv')
-backup_df = pd.read_csv('processed_data/Rk.csv')
+communities_df = data['communities_df']
+warehouses_df = data['warehouses_df']
+backup_df = data['backup_df']
 
-# --matrices
-distances_main_df = pd.read_csv('processed_data/dji_matrix.csv')
-
-distances_backup_df = pd.read_csv('processed_data/bik_matrix.csv')
-
-
-# Convert dataframes to dictionaries
-''' 
-The zip() function returns a zip object, which is an iterator of tuples where the first item in each passed iterator is paired together,
- and then the second item in each passed iterator are paired together etc.
-'''
 # Community Population Data (Pj) - QUALITY CHECK PASSED
-C = communities_df['district'].tolist()
-demand = dict(zip(communities_df['district'], communities_df['population']))
+C = data['C']
+demand = data['demand']
 
 # Main Warehouse Opening Cost Data (Ci) - QUALITY CHECK PASSED
-I = warehouses_df['wh_id'].to_list()
-cost_main = dict(zip(warehouses_df['wh_id'], warehouses_df['cost']))
+I = data['I']
+cost_main = data['cost_main']
 
 # dij (Distance) matrix from Main Warehouse to Community, in kilometers - QUALITY CHECK PASSED
-# here the notation should be community instead of warehouse
-dist_main = {
-    (row['wh_id'], community): row[community]
-    for _, row in distances_main_df.iterrows()
-    for community in distances_main_df.columns[1:] # Skipping district column
-}
+dist_main = data['dist_main']
 
 # Backup Facilities Candidates Opening Costs (Rk)
-J = backup_df['wh_id'].to_list()
-cost_backup = dict(zip(backup_df['wh_id'], backup_df['cost']))
-
+J = data['J']
+cost_backup = data['cost_backup']
 
 # bik (distance) matrix from Main Warehouse to BackUp Facilities - QUALITY CHECK PASSED
-dist_backup = {
-    (row['wh_id'], float(backup)): row[backup]
-    for _, row in distances_backup_df.iterrows()
-    for backup in distances_backup_df.columns[1:] # Skipping Main Warehouse column
-}
+dist_backup = data['dist_backup']
 
 
 # Setting up the alpha
 alpha = 0.5
 
+# Maximum number of warehouses covered by each backup facility
+max_backup = 3
+
+# Form of the ServeIfOpen linking constraints: 'strong', 'aggregated', 'lazy' or 'lazy_aggregated'
+linking = 'strong'
+
 
 
 ##############################################
 ################ OPT MODELING ################ 
 ##############################################
 
-# Naming the model
-model = gp.Model('Cusco_Earthquake')
-
-# Define decision variables
-x = model.addVars(I, vtype=GRB.BINARY, name='x')  # Main Warehouse Selection [Xi]
-z = model.addVars(J, vtype=GRB.BINARY, name='z')  # Backup facility selection [Zk]
-y = model.addVars(I, C, vtype=GRB.BINARY, name='y')  # Communities being covered by Warehouses [Yij]
-w = model.addVars(I, J, vtype=GRB.BINARY, name='w')  # Back-Up facilities covering Main Warehouse
-
-# OF
-model.setObjective(
-    gp.quicksum(cost_main[i] * x[i] for i in I) + 
-    gp.quicksum(demand[j] * dist_main[i, j] * y[i, j] for i in I for j in C) +
-    alpha * (
-        gp.quicksum(cost_backup[k] * z[k] for k in J) + 
-        gp.quicksum(dist_backup[i, k] * w[i, k] for i in I for k in J)
-    ),
-    GRB.MINIMIZE
-)
-
-# Constraints
-
-# C1: Coverage of Communities by Main Warehouse
-for j in C:
-    model.addConstr(gp.quicksum(y[i,j] for i in I) >= 1, f'CommunityCoverage_{j}')
-
-# C2: Service of Communities by Selected Warehouses
-for i in I:
-    for j in C:
-        model.addConstr(y[i,j] <= x[i], f'ServeIfOpen_{i}_{j}')
-
-# C3: Backup Facility Coverage of Warehouses
-for i in I:
-    model.addConstr(gp.quicksum(w[i,k] for k in J) >= x[i], f'BackupCover_{i}')
-
-# C4: Association of Main Warehouses with BackUp Facilities
-for i in I:
-    for k in J:
-        model.addConstr(w[i,k] <= z[k], f'BackupOpenIfCovering_{i}_{k}')
+# Model formulation (objective and constraints C1-C5) lives in opt_model.build_model
+model, x, z, y, w = build_model(data, alpha, max_backup, linking=linking)
 
-# C5: Limit the number of Warehouses covered by each BackUp Facilities
-for k in J:
-    model.addConstr(gp.quicksum(w[i, k] for i in I) <= 3, f'MaxWarehousesPerBackup_{k}') # changing to maximum allowed 
+# Gurobi parameters tuned for this instance size (param_tuning.py), if any
+tuned_params = apply_tuned_params(model, len(I), len(C))
+print(f"Tuned parameters: {tuned_params or 'defaults'}")
 
-# Solvingd the model
-model.optimize()
+# Solvingd the model (attaches the lazy linking callback when needed)
+optimize_model(model)
 
 # Output results
 if model.status == GRB.OPTIMAL:
@@ -6,6 +6,7 @@ import re
 import matplotlib.pyplot as plt
 import folium
 import contextily as ctx
+from geo_utils import harversine
 
 
 
@@ -85,27 +86,7 @@ DISTANCE MATRIX FROM CI to Community (RADIUS) (Dji)
 ############################################################################################
 '''
 
-# Earth radius in kilometers
-R = 6371.0
-
-def harversine(lat1, lon1, lat2, lon2):
-    """
-    Compute the harversine distance between two points on the surface 
-    To create the distance matrix between candidate main warehouses and communities
-    """
-
-    # Converting degrees to radians
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-
-    # Differences in coordinates
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    # Harversine formula
-    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    distance = R * c
-    return distance
+# Harversine distance (see geo_utils.py)
 
 '''
 # Creating an empty distance matrix (Notation: Dji)
@@ -0,0 +1,296 @@
+"""
+Decouples model building from solving. Scenarios (province set, alpha and
+backup cap) are built on one core and serialized to a spool directory as
+compressed MPS files plus a JSON sidecar with the variable index maps. A
+pool of solver workers, on this machine or on any machine sharing the spool
+directory, claims the queued models, solves them and writes the solutions
+back next to them.
+
+Usage:
+    python model_spool.py build <spool_dir> <scenarios.json>
+    python model_spool.py solve <spool_dir> [workers] [threads]
+    python model_spool.py collect <spool_dir>
+
+where scenarios.json is a list of objects such as
+{"id": "4prov_a05", "provinces": ["Cusco", "Anta"], "alpha": 0.5, "max_backup": 3}
+("provinces": null keeps every community; an optional "linking" selects
+the ServeIfOpen form, see opt_model.LINKING_FORMS).
+
+Spool layout, per scenario id:
+    <id>.mps.gz         the model
+    <id>.queued         sidecar, waiting for a worker
+    <id>.running        sidecar, claimed by a worker
+    <id>.done           sidecar, solved
+    <id>.solution.json  objective, status and non-zero variable values
+    <id>.sol            Gurobi solution file
+    <id>.log            Gurobi log
+"""
+
+import glob, json, multiprocessing, os, socket, sys, time
+import gurobipy as gp
+
+from opt_model import (load_data, build_model, optimize_model, set_lazy_linking,
+                       apply_tuned_params)
+
+
+def _write_json(path, obj):
+    """
+    Writes obj as JSON to path atomically (write to a temporary file and
+    rename), so that readers on a shared filesystem never see partial files.
+    """
+
+    tmp = f'{path}.{socket.gethostname()}-{os.getpid()}.tmp'
+    with open(tmp, 'w') as json_file:
+        json.dump(obj, json_file)
+    os.replace(tmp, path)
+
+
+def _key(key):
+    """
+    JSON keeps lists but not tuples: converts a variable key back to the
+    tupledict key used by the model.
+    """
+
+    return tuple(key) if isinstance(key, list) else key
+
+
+##############################################
+################### BUILD ####################
+##############################################
+
+def spool_model(model, variables, spool_dir, scenario_id, scenario = None):
+    """
+    Writes model to spool_dir/<scenario_id>.mps.gz and queues it. variables
+    maps family names to tupledicts (e.g. {'x': x, 'y': y}); their keys and
+    column ranges are stored in the sidecar, since MPS does not preserve the
+    variable names (community names contain spaces).
+    """
+
+    model.update()
+    maps = {}
+    for name, var in variables.items():
+        keys = list(var.keys())
+        maps[name] = {
+            'start': var[keys[0]].index if keys else 0,
+            'keys': [list(k) if isinstance(k, tuple) else k for k in keys],
+        }
+
+    model.write(os.path.join(spool_dir, f'{scenario_id}.mps.gz'))
+
+    # The sidecar goes last: its presence is what makes the job visible
+    _write_json(os.path.join(spool_dir, f'{scenario_id}.queued'), {
+        'id': scenario_id,
+        'scenario': scenario or {},
+        'vars': maps,
+    })
+
+
+def build_scenarios(scenarios, spool_dir):
+    """
+    Builds every scenario and spools it. Data for a province set is loaded
+    once and shared by all scenarios using it. Returns the spooled ids.
+    """
+
+    os.makedirs(spool_dir, exist_ok = True)
+    datasets = {}
+    ids = []
+    for n, scenario in enumerate(scenarios):
+        scenario_id = scenario.get('id', f'scenario_{n:04d}')
+        provinces = scenario.get('provinces')
+        key = None if provinces is None else tuple(sorted(provinces))
+        if key not in datasets:
+            datasets[key] = load_data(provinces, scenario.get('data_dir', 'processed_data'))
+        model, x, z, y, w = build_model(datasets[key],
+                                        scenario.get('alpha', 0.5),
+                                        scenario.get('max_backup', 3),
+                                        linking = scenario.get('linking', 'strong'))
+        spool_model(model, {'x': x, 'z': z, 'y': y, 'w': w}, spool_dir,
+                    scenario_id, scenario)
+        model.dispose()
+        ids.append(scenario_id)
+        print(f'Spooled {scenario_id}')
+    return ids
+
+
+##############################################
+################### SOLVE ####################
+##############################################
+
+def claim(spool_dir):
+    """
+    Claims the next queued model by renaming its sidecar to .running (an
+    atomic operation, so two workers never get the same job). Returns the
+    scenario id or None when the queue is empty.
+    """
+
+    for queued in sorted(glob.glob(os.path.join(spool_dir, '*.queued'))):
+        running = queued[:-len('.queued')] + '.running'
+        try:
+            os.rename(queued, running)
+        except FileNotFoundError:
+            continue  # Taken by another worker
+        return os.path.basename(queued)[:-len('.queued')]
+    return None
+
+
+def solve_spooled(spool_dir, scenario_id, threads = 1):
+    """
+    Solves a claimed model and writes its solution back to the spool
+    directory. Variable values are reported per family and key, through
+    the index maps of the sidecar.
+    """
+
+    base = os.path.join(spool_dir, scenario_id)
+    with open(f'{base}.running') as json_file:
+        sidecar = json.load(json_file)
+
+    model = gp.read(f'{base}.mps.gz')
+    n_warehouses = len(sidecar['vars']['x']['keys'])
+    apply_tuned_params(model, n_warehouses, len(sidecar['vars']['y']['keys']) // max(1, n_warehouses))
+    model.Params.OutputFlag = 0
+    model.Params.LogFile = f'{base}.log'
+    model.Params.Threads = threads  # The pool decides how cores are shared
+    if sidecar['scenario'].get('linking', 'strong').startswith('lazy'):
+        # Callbacks are not part of the MPS file: rebuild the lazy
+        # ServeIfOpen pairs from the index maps
+        mvars = model.getVars()
+        x_index = {_key(k): n for n, k in enumerate(sidecar['vars']['x']['keys'])}
+        x_start, y_start = sidecar['vars']['x']['start'], sidecar['vars']['y']['start']
+        y_keys = sidecar['vars']['y']['keys']
+        set_lazy_linking(model,
+                         [mvars[y_start + n] for n in range(len(y_keys))],
+                         [mvars[x_start + x_index[i]] for i, j in y_keys])
+    optimize_model(model)
+
+    solution = {
+        'id': scenario_id,
+        'status': model.Status,
+        'runtime': model.Runtime,
+        'worker': f'{socket.gethostname()}-{os.getpid()}',
+        'objective': None,
+        'values': {},
+    }
+    if model.SolCount > 0:
+        solution['objective'] = model.ObjVal
+        values = model.getAttr('X', model.getVars())
+        for name, info in sidecar['vars'].items():
+            start = info['start']
+            solution['values'][name] = [
+                [key, values[start + n]]
+                for n, key in enumerate(info['keys'])
+                if abs(values[start + n]) > 1e-6
+            ]
+        model.write(f'{base}.sol')
+    model.dispose()
+
+    _write_json(f'{base}.solution.json', solution)
+    os.replace(f'{base}.running', f'{base}.done')
+    return solution
+
+
+def solve_worker(spool_dir, threads = 1):
+    """
+    Worker loop: claims and solves models until the queue is empty.
+    Returns the number of models solved.
+    """
+
+    solved = 0
+    while True:
+        scenario_id = claim(spool_dir)
+        if scenario_id is None:
+            return solved
+        solution = solve_spooled(spool_dir, scenario_id, threads)
+        solved += 1
+        print(f"Solved {scenario_id} (status {solution['status']}, "
+              f"{solution['runtime']:.2f}s) on {solution['worker']}")
+
+
+def run_pool(spool_dir, workers = None, threads = 1):
+    """
+    Starts a pool of solver worker processes on the spool directory and
+    waits until it is drained. Returns the number of models solved.
+    """
+
+    if workers is None:
+        workers = max(1, os.cpu_count() // threads)
+    with multiprocessing.Pool(workers) as pool:
+        counts = pool.starmap(solve_worker, [(spool_dir, threads)] * workers)
+    return sum(counts)
+
+
+##############################################
+################## RESULTS ###################
+##############################################
+
+def load_solution(spool_dir, scenario_id):
+    """
+    Reads a solution written by a worker. Returns the solution dictionary,
+    with 'values' converted back to {family: {key: value}} so it can be
+    passed to opt_model.extract_solution.
+    """
+
+    with open(os.path.join(spool_dir, f'{scenario_id}.solution.json')) as json_file:
+        solution = json.load(json_file)
+    solution['values'] = {
+        name: {_key(key): value for key, value in pairs}
+        for name, pairs in solution['values'].items()
+    }
+    return solution
+
+
+def collect(spool_dir):
+    """
+    Prints the status of every scenario in the spool directory.
+    """
+
+    states = {}
+    for state in ('queued', 'running', 'done'):
+        for path in glob.glob(os.path.join(spool_dir, f'*.{state}')):
+            states[os.path.basename(path)[:-len(state) - 1]] = state
+
+    for scenario_id in sorted(states):
+        if states[scenario_id] != 'done':
+            print(f'{scenario_id}: {states[scenario_id]}')
+            continue
+        solution = load_solution(spool_dir, scenario_id)
+        opened = [i for i, v in solution['values'].get('x', {}).items() if v > 0.5]
+        objective = solution['objective']
+        objective = 'n/a' if objective is None else f'{objective:.2f}'
+        print(f"{scenario_id}: done, status {solution['status']}, "
+              f"objective {objective}, {solution['runtime']:.2f}s, "
+              f"warehouses {opened}")
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2 or argv[0] not in ('build', 'solve', 'collect'):
+        print(__doc__)
+        sys.exit(0)
+
+    spool_dir = argv[1]
+    if argv[0] == 'build':
+        with open(argv[2]) as json_file:
+            scenarios = json.load(json_file)
+        start = time.time()
+        ids = build_scenarios(scenarios, spool_dir)
+        print(f'Built {len(ids)} models in {time.time() - start:.2f}s')
+    elif argv[0] == 'solve':
+        workers = int(argv[2]) if len(argv) > 2 else None
+        threads = int(argv[3]) if len(argv) > 3 else 1
+        start = time.time()
+        solved = run_pool(spool_dir, workers, threads)
+        print(f'Solved {solved} models in {time.time() - start:.2f}s')
+    else:
+        collect(spool_dir)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python model_spool.py build spool scenarios.json
+#      python model_spool.py solve spool 4
+#      python model_spool.py collect spool
+# Windows: py model_spool.py build spool scenarios.json
@@ -0,0 +1,385 @@
+"""
+Data loading and model construction for the Cusco earthquake facility
+location model. main.py and the batch tools (model_spool.py) build the
+exact same model through these functions.
+"""
+
+import json, os
+import gurobipy as gp
+from gurobipy import GRB
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+# Best Gurobi parameters per instance class, written by param_tuning.py
+TUNED_PARAMS_FILE = 'tuned_params.json'
+
+# Instance classes, by warehouse-community pairs. The bounds are the
+# geometric means between the sizes of the param_tuning.FAMILY instances
+# on processed_data (14 warehouses x 32, 66 and 116 communities: 448, 924
+# and 1624 pairs), so each province set of the family is its own class.
+# param_tuning.py recomputes them from the family it tunes (class_bounds)
+# and stores them with the parameters.
+CLASS_NAMES = ('small', 'medium', 'large')
+CLASS_BOUNDS = (643, 1225)
+
+# Main warehouse (hub) connected to every opened facility
+MAIN_WAREHOUSE_ID = 160001
+
+##############################################
+################ DATA SECTION ################
+##############################################
+
+def load_data(target_provinces = None, data_dir = 'processed_data'):
+    """
+    Reads the processed CSVs (Pj, Ci, Rk, dji and bik matrices) and returns
+    a dictionary with the dataframes and the sets/parameters of the model.
+    If target_provinces is given, only communities within those provinces
+    are kept.
+    """
+
+    communities_df = pd.read_csv(f'{data_dir}/Pj.csv')
+    if target_provinces is not None:
+        communities_df = communities_df[communities_df['province'].isin(target_provinces)]
+
+    warehouses_df = pd.read_csv(f'{data_dir}/Ci.csv')
+    backup_df = pd.read_csv(f'{data_dir}/Rk.csv')
+
+    # --matrices
+    distances_main_df = pd.read_csv(f'{data_dir}/dji_matrix.csv')
+    distances_backup_df = pd.read_csv(f'{data_dir}/bik_matrix.csv')
+
+    # Community Population Data (Pj)
+    C = communities_df['district'].tolist()
+    demand = dict(zip(communities_df['district'], communities_df['population']))
+
+    # Main Warehouse Opening Cost Data (Ci)
+    I = warehouses_df['wh_id'].to_list()
+    cost_main = dict(zip(warehouses_df['wh_id'], warehouses_df['cost']))
+
+    # dij (Distance) matrix from Main Warehouse to Community, in kilometers
+    # Only the communities kept in C are needed by the model
+    dji = distances_main_df.set_index('wh_id')[C]
+    dist_main = {
+        (wh, community): distance
+        for wh, row in zip(dji.index, dji.to_numpy())
+        for community, distance in zip(C, row)
+    }
+
+    # Backup Facilities Candidates Opening Costs (Rk)
+    J = backup_df['wh_id'].to_list()
+    cost_backup = dict(zip(backup_df['wh_id'], backup_df['cost']))
+
+    # bik (distance) matrix from Main Warehouse to BackUp Facilities
+    bik = distances_backup_df.set_index('wh_id')
+    backups = [float(backup) for backup in bik.columns]
+    dist_backup = {
+        (wh, backup): distance
+        for wh, row in zip(bik.index, bik.to_numpy())
+        for backup, distance in zip(backups, row)
+    }
+
+    return {
+        'communities_df': communities_df,
+        'warehouses_df': warehouses_df,
+        'backup_df': backup_df,
+        'C': C,
+        'demand': demand,
+        'I': I,
+        'cost_main': cost_main,
+        'dist_main': dist_main,
+        'J': J,
+        'cost_backup': cost_backup,
+        'dist_backup': dist_backup,
+    }
+
+
+##############################################
+################ OPT MODELING ################
+##############################################
+
+# Forms of the ServeIfOpen (C2) linking constraints:
+#   'strong'          y[i,j] <= x[i] for every pair (|I| x |C| rows)
+#   'aggregated'      sum_j y[i,j] <= |C| x[i] (|I| rows, weaker LP bound)
+#   'lazy'            no linking rows; violated y[i,j] <= x[i] are added by
+#                     the callback (lazy on incumbents, cuts on node LPs)
+#   'lazy_aggregated' aggregated rows, strengthened by the same callback
+LINKING_FORMS = ('strong', 'aggregated', 'lazy', 'lazy_aggregated')
+
+
+def build_model(data, alpha = 0.5, max_backup = 3, name = 'Cusco_Earthquake',
+                linking = 'strong', failure_prob = None, failure_cost = None):
+    """
+    Builds the facility location model on the sets and parameters returned
+    by load_data. alpha weights the backup part of the objective and
+    max_backup limits the number of warehouses covered by each backup
+    facility. linking selects the form of the ServeIfOpen constraints (see
+    LINKING_FORMS); the lazy forms must be solved with optimize_model.
+    failure_prob ({warehouse id: probability}, e.g. from
+    ground_motion.failure_prob) adds the expected cost of the demand whose
+    warehouse fails, failure_cost per person (by default the mean
+    warehouse-community distance, in the units of the service cost).
+    Returns the model and the x, z, y, w variables.
+    """
+
+    if linking not in LINKING_FORMS:
+        raise ValueError(f'linking must be one of {LINKING_FORMS}, got {linking!r}')
+
+    C, I, J = data['C'], data['I'], data['J']
+    demand, cost_main, dist_main = data['demand'], data['cost_main'], data['dist_main']
+    cost_backup, dist_backup = data['cost_backup'], data['dist_backup']
+
+    # Naming the model
+    model = gp.Model(name)
+
+    # Define decision variables
+    x = model.addVars(I, vtype=GRB.BINARY, name='x')  # Main Warehouse Selection [Xi]
+    z = model.addVars(J, vtype=GRB.BINARY, name='z')  # Backup facility selection [Zk]
+    y = model.addVars(I, C, vtype=GRB.BINARY, name='y')  # Communities being covered by Warehouses [Yij]
+    w = model.addVars(I, J, vtype=GRB.BINARY, name='w')  # Back-Up facilities covering Main Warehouse
+
+    # OF
+    objective = (
+        gp.quicksum(cost_main[i] * x[i] for i in I) +
+        gp.quicksum(demand[j] * dist_main[i, j] * y[i, j] for i in I for j in C) +
+        alpha * (
+            gp.quicksum(cost_backup[k] * z[k] for k in J) +
+            gp.quicksum(dist_backup[i, k] * w[i, k] for i in I for k in J)
+        )
+    )
+
+    # Expected cost of the demand left without its warehouse in an earthquake
+    if failure_prob is not None:
+        if failure_cost is None:
+            failure_cost = float(np.mean([dist_main[i, j] for i in I for j in C]))
+        objective += failure_cost * gp.quicksum(
+            failure_prob.get(i, 0.0) * demand[j] * y[i, j] for i in I for j in C)
+
+    model.setObjective(objective, GRB.MINIMIZE)
+
+    # Constraints
+
+    # C1: Coverage of Communities by Main Warehouse
+    for j in C:
+        model.addConstr(gp.quicksum(y[i,j] for i in I) >= 1, f'CommunityCoverage_{j}')
+
+    # C2: Service of Communities by Selected Warehouses
+    if linking == 'strong':
+        for i in I:
+            for j in C:
+                model.addConstr(y[i,j] <= x[i], f'ServeIfOpen_{i}_{j}')
+    elif linking in ('aggregated', 'lazy_aggregated'):
+        for i in I:
+            model.addConstr(gp.quicksum(y[i,j] for j in C) <= len(C) * x[i], f'ServeIfOpen_{i}')
+    if linking.startswith('lazy'):
+        set_lazy_linking(model, [y[i,j] for i in I for j in C], [x[i] for i in I for j in C])
+
+    # C3: Backup Facility Coverage of Warehouses
+    for i in I:
+        model.addConstr(gp.quicksum(w[i,k] for k in J) >= x[i], f'BackupCover_{i}')
+
+    # C4: Association of Main Warehouses with BackUp Facilities
+    for i in I:
+        for k in J:
+            model.addConstr(w[i,k] <= z[k], f'BackupOpenIfCovering_{i}_{k}')
+
+    # C5: Limit the number of Warehouses covered by each BackUp Facilities
+    for k in J:
+        model.addConstr(gp.quicksum(w[i, k] for i in I) <= max_backup, f'MaxWarehousesPerBackup_{k}')
+
+    return model, x, z, y, w
+
+
+def set_lazy_linking(model, y_vars, x_vars):
+    """
+    Registers the lazy ServeIfOpen constraints y_vars[n] <= x_vars[n] on
+    model. They are enforced by linking_callback when the model is solved
+    through optimize_model.
+    """
+
+    model._link_y = y_vars
+    model._link_x = x_vars
+    model._link_added = 0
+    model.Params.LazyConstraints = 1
+    model.Params.PreCrush = 1  # Cuts added on node relaxations are on the original model
+
+
+def linking_callback(model, where, tol = 1e-4):
+    """
+    Separates the violated y[i,j] <= x[i] constraints: as lazy constraints
+    on every new incumbent, and as user cuts on optimal node relaxations.
+    """
+
+    if where == GRB.Callback.MIPSOL:
+        y_val = np.array(model.cbGetSolution(model._link_y))
+        x_val = np.array(model.cbGetSolution(model._link_x))
+        for n in np.nonzero(y_val - x_val > tol)[0]:
+            model.cbLazy(model._link_y[n] <= model._link_x[n])
+            model._link_added += 1
+    elif where == GRB.Callback.MIPNODE:
+        if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+            return
+        y_val = np.array(model.cbGetNodeRel(model._link_y))
+        x_val = np.array(model.cbGetNodeRel(model._link_x))
+        for n in np.nonzero(y_val - x_val > tol)[0]:
+            model.cbCut(model._link_y[n] <= model._link_x[n])
+            model._link_added += 1
+
+
+def class_bounds(pair_counts, classes = len(CLASS_NAMES)):
+    """
+    Class bounds for instances with the given warehouse-community pair
+    counts: the distinct counts are split into (at most) classes quantile
+    groups, and each bound is the geometric mean of the largest count of a
+    group and the smallest of the next one.
+    """
+
+    sizes = sorted(set(pair_counts))
+    groups = np.array_split(sizes, min(classes, len(sizes)))
+    return tuple(int(round(np.sqrt(low[-1] * high[0]))) for low, high in zip(groups, groups[1:]))
+
+
+def instance_class(n_warehouses, n_communities, bounds = CLASS_BOUNDS):
+    """
+    Size class of an instance, by the number of warehouse-community pairs
+    (the y variables) against bounds (class_bounds). Tuned parameters are
+    stored per class.
+    """
+
+    pairs = n_warehouses * n_communities
+    return CLASS_NAMES[int(np.searchsorted(bounds, pairs))]
+
+
+def apply_tuned_params(model, n_warehouses, n_communities, path = TUNED_PARAMS_FILE):
+    """
+    Sets on model the parameters tuned for its instance class (with the
+    class bounds stored in path), if param_tuning.py has stored any in
+    path. Returns the parameters applied.
+    """
+
+    if not os.path.exists(path):
+        return {}
+    with open(path) as json_file:
+        tuned = json.load(json_file)
+    bounds = tuned.get('bounds', CLASS_BOUNDS)
+    params = tuned.get(instance_class(n_warehouses, n_communities, bounds), {}).get('params', {})
+    for name, value in params.items():
+        model.setParam(name, value)
+    return params
+
+
+def optimize_model(model):
+    """
+    Solves model, attaching the linking callback if it was built with a
+    lazy linking form.
+    """
+
+    if hasattr(model, '_link_y'):
+        model.optimize(linking_callback)
+    else:
+        model.optimize()
+
+
+##############################################
+############# SOLUTION EXTRACTION ############
+##############################################
+
+def extract_solution(data, values):
+    """
+    Builds the connectivity matrices of a solved model. values maps the
+    variable families ('x', 'z', 'y', 'w') to dictionaries {key: value},
+    e.g. {'x': model.getAttr('X', x), ...}, or the solution written back by
+    a spool worker. Returns a dictionary with the opened facilities and the
+    community-to-warehouse, warehouse-to-backup and backup-to-community
+    matrices, in the same layout as main.py.
+    """
+
+    C, I, J = data['C'], data['I'], data['J']
+    x, z, y, w = values['x'], values['z'], values['y'], values['w']
+
+    main_warehouses = [i for i in I if x.get(i, 0) > 0.5]
+    backup_facilities = [k for k in J if z.get(k, 0) > 0.5]
+
+    community_warehouse_matrix = {}
+    for i in I:
+        for j in C:
+            community_warehouse_matrix[(j, i)] = 1 if y.get((i, j), 0) > 0.5 else 0
+
+    warehouse_backup_matrix = {}
+    for i in I:
+        for k in J:
+            warehouse_backup_matrix[(i, k)] = 1 if w.get((i, k), 0) > 0.5 else 0
+
+    # Backups inherit the communities served by the warehouses they cover
+    served_by = {i: [j for j in C if community_warehouse_matrix[(j, i)] == 1] for i in I}
+    backup_community_matrix = {}
+    for (warehouse, backup), wb_connected in warehouse_backup_matrix.items():
+        if wb_connected == 1:
+            for community in served_by[warehouse]:
+                backup_community_matrix[(community, backup)] = 1
+
+    return {
+        'main_warehouses': main_warehouses,
+        'backup_facilities': backup_facilities,
+        'community_warehouse_matrix': community_warehouse_matrix,
+        'warehouse_backup_matrix': warehouse_backup_matrix,
+        'backup_community_matrix': backup_community_matrix,
+    }
+
+
+##############################################
+########## NETWORK REPRESENTATION ############
+##############################################
+
+def solution_network(data, solution, backups = True, main_warehouse_id = MAIN_WAREHOUSE_ID):
+    """
+    Builds the network of a solution as in main.py: communities, opened
+    warehouses and (if backups) opened backup facilities, the main
+    warehouse connected to every opened facility and the opened warehouses
+    connected to each other. backups = True gives final_network_MAIN.gml,
+    backups = False final_network_MAIN_OnlyWarehouses.gml.
+    """
+
+    community_warehouse_matrix = solution['community_warehouse_matrix']
+    warehouse_backup_matrix = solution['warehouse_backup_matrix']
+    backup_community_matrix = solution['backup_community_matrix']
+
+    opened_warehouses = set(warehouse for (_, warehouse), connected in community_warehouse_matrix.items() if connected == 1)
+    opened_backups = set(backup for (_, backup), connected in warehouse_backup_matrix.items() if connected == 1) if backups else set()
+
+    G = nx.DiGraph()
+    for community in data['C']:
+        G.add_node(community, label="Community", color='blue', size=100)
+    for warehouse in data['I']:
+        if warehouse in opened_warehouses:
+            G.add_node(warehouse, label="Warehouse", color='green', size=150)
+    for backup in data['J']:
+        if backup in opened_backups:
+            G.add_node(backup, label="Backup Facility", color='red', size=70)
+    if main_warehouse_id not in G.nodes:
+        G.add_node(main_warehouse_id, label="Main Warehouse", color='yellow', size=200)
+
+    # Warehouse serves Community
+    for (community, warehouse), connected in community_warehouse_matrix.items():
+        if connected == 1 and warehouse in opened_warehouses:
+            G.add_edge(warehouse, community)
+
+    if backups:
+        # Warehouse is backed up by Backup Facility
+        for (warehouse, backup), connected in warehouse_backup_matrix.items():
+            if connected == 1 and backup in opened_backups:
+                G.add_edge(warehouse, backup)
+        # Backup Facility directly connects to Community
+        for (community, backup), connected in backup_community_matrix.items():
+            if connected == 1 and backup in opened_backups:
+                G.add_edge(backup, community)
+
+    # Main warehouse to every opened facility, opened warehouses to each other
+    for facility in opened_warehouses | opened_backups:
+        G.add_edge(main_warehouse_id, facility)
+    for warehouse1 in opened_warehouses:
+        for warehouse2 in opened_warehouses:
+            if warehouse1 != warehouse2:
+                G.add_edge(warehouse1, warehouse2)
+
+    return G
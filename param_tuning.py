@@ -0,0 +1,152 @@
+"""
+Parameter tuning harness for the Cusco_Earthquake model. A family of
+representative instances (province sets, alpha values and backup caps) is
+grouped by instance class (opt_model.instance_class, with bounds cut
+between the sizes of the family instances), every class is run
+through a seeded random search over MIPFocus, Cuts, Presolve and Threads,
+and the best parameter set per class is persisted to tuned_params.json.
+main.py and the spool workers apply it automatically
+(opt_model.apply_tuned_params).
+
+Usage: python param_tuning.py [trials] [time_limit] [seed]
+
+where trials is the number of parameter sets tried per class besides the
+defaults (default 20), time_limit is the Gurobi time limit per solve in
+seconds (default 300) and seed fixes the search (default 0).
+"""
+
+import datetime, itertools, json, os, random, sys
+from gurobipy import GRB
+
+from opt_model import (TUNED_PARAMS_FILE, class_bounds, instance_class, load_data,
+                       build_model, optimize_model)
+
+# Representative instances: (provinces, alpha, max_backup)
+FAMILY = [
+    (provinces, alpha, max_backup)
+    for provinces in (['Cusco', 'Anta', 'Calca', 'Urubamba'],
+                      ['Cusco', 'Anta', 'Calca', 'Urubamba', 'Paruro', 'Acomayo',
+                       'Quispicanchi', 'Paucartambo'],
+                      None)
+    for alpha in (0.25, 0.5, 1.0)
+    for max_backup in (1, 3)
+]
+
+# Search space
+SPACE = {
+    'MIPFocus': [0, 1, 2, 3],
+    'Cuts': [-1, 0, 1, 2, 3],
+    'Presolve': [-1, 0, 1, 2],
+    'Threads': sorted({0, 1, max(1, (os.cpu_count() or 1) // 2)}),
+}
+
+
+def candidates(trials, seed = 0):
+    """
+    Returns the default parameter set ({}) followed by up to trials distinct
+    parameter sets sampled from SPACE.
+    """
+
+    grid = [dict(zip(SPACE, values)) for values in itertools.product(*SPACE.values())]
+    random.Random(seed).shuffle(grid)
+    return [{}] + grid[:trials]
+
+
+def evaluate(models, params, time_limit):
+    """
+    Solves every model with params and returns the score: total runtime,
+    counting solves that hit the time limit twice (PAR-2).
+    """
+
+    score = 0.0
+    for model in models:
+        model.reset()
+        model.resetParams()
+        model.Params.OutputFlag = 0
+        model.Params.TimeLimit = time_limit
+        for name, value in params.items():
+            model.setParam(name, value)
+        optimize_model(model)
+        runtime = model.Runtime
+        if model.Status != GRB.OPTIMAL:
+            runtime = 2 * time_limit
+        score += runtime
+    return score
+
+
+def tune(family = FAMILY, trials = 20, time_limit = 300, seed = 0,
+         data_dir = 'processed_data', path = TUNED_PARAMS_FILE):
+    """
+    Tunes every instance class present in family and stores the best
+    parameter set of each class in path, with the class bounds derived
+    from the family sizes (opt_model.class_bounds). Classes not in family
+    are kept if the stored bounds are the same. Returns the stored
+    dictionary.
+    """
+
+    # Load the datasets once and cut the classes between their sizes
+    datasets = {}
+    for provinces, alpha, max_backup in family:
+        key = None if provinces is None else tuple(sorted(provinces))
+        if key not in datasets:
+            datasets[key] = load_data(provinces, data_dir)
+    bounds = class_bounds([len(data['I']) * len(data['C']) for data in datasets.values()])
+
+    # Build the instances and group them by class
+    classes = {}
+    for provinces, alpha, max_backup in family:
+        data = datasets[None if provinces is None else tuple(sorted(provinces))]
+        model, x, z, y, w = build_model(data, alpha, max_backup)
+        classes.setdefault(instance_class(len(data['I']), len(data['C']), bounds), []).append(model)
+
+    tuned = {}
+    if os.path.exists(path):
+        with open(path) as json_file:
+            tuned = json.load(json_file)
+        if tuple(tuned.get('bounds', ())) != bounds:
+            tuned = {}
+    tuned['bounds'] = list(bounds)
+
+    for name, models in classes.items():
+        best_params, best_score, default_score = None, None, None
+        for params in candidates(trials, seed):
+            score = evaluate(models, params, time_limit)
+            print(f'{name}: {params or "defaults"} -> {score:.2f}s')
+            if not params:
+                default_score = score
+            if best_score is None or score < best_score:
+                best_params, best_score = params, score
+        tuned[name] = {
+            'params': best_params,
+            'score': best_score,
+            'default_score': default_score,
+            'instances': len(models),
+            'time_limit': time_limit,
+            'tuned_at': datetime.datetime.now().isoformat(timespec = 'seconds'),
+        }
+        print(f'Best for {name}: {best_params or "defaults"} '
+              f'({best_score:.2f}s vs {default_score:.2f}s with defaults)')
+        for model in models:
+            model.dispose()
+
+    with open(path, 'w') as json_file:
+        json.dump(tuned, json_file, indent = 4)
+    return tuned
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    trials = int(argv[0]) if len(argv) > 0 else 20
+    time_limit = float(argv[1]) if len(argv) > 1 else 300
+    seed = int(argv[2]) if len(argv) > 2 else 0
+    tune(FAMILY, trials, time_limit, seed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python param_tuning.py 20 300
+# Windows: py param_tuning.py 20 300
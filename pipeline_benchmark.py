@@ -0,0 +1,203 @@
+"""
+End-to-end benchmark of the pipeline, matrix_data_generation.py -> main.py
+-> GML export -> robustness_analysis.py, on synthetic instances of growing
+size (synthetic_data_generation.py). Every stage is timed and its peak
+memory recorded. tracemalloc slows pure Python code several times, so the
+times come from an untraced run and the peak traced memory of every stage
+from a second, traced run (skipped with memory = False):
+
+    distance     distance matrices computed and written to CSV
+    ingest       CSVs read into the model sets (opt_model.load_data)
+    model_build  Gurobi model construction
+    solve        Gurobi solve
+    extraction   connectivity matrices of the solution
+    graph_build  solution network built and exported to GML
+    robustness   degree, betweenness, closeness and random attack curves
+
+Results are stored as JSON. The run fails (exit code 1) when a stage
+raises; given a baseline file, it also fails when a stage is slower than
+the baseline by more than the threshold or missing from the results.
+
+Usage: python pipeline_benchmark.py <outfile.json> [baseline.json] [threshold] [sizes] [memory]
+
+where threshold is the allowed relative slowdown (default 0.25), sizes a
+comma separated list of community counts (default 10,100,1000) and memory
+False skips the traced run.
+"""
+
+import json, os, platform, resource, shutil, sys, tempfile, time, tracemalloc
+import networkx
+
+import robustness_analysis
+from opt_model import load_data, build_model, optimize_model, extract_solution, solution_network
+from synthetic_data_generation import generate_instance, write_instance
+
+STAGES = ['distance', 'ingest', 'model_build', 'solve', 'extraction',
+          'graph_build', 'robustness']
+
+# Stages faster than this (seconds) are too noisy to be flagged
+MIN_TIME = 0.05
+
+
+def _stage(record, name, function, *args, trace = False):
+    """
+    Runs function(*args) as stage name, storing its wall time and the peak
+    resident memory of the process so far (MB) in record, or with trace
+    only its peak traced memory (MB). Returns the function's result.
+    """
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            record[name] = {'peak_mb': peak / 2**20}
+        else:
+            record[name] = {
+                'time': elapsed,
+                'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+
+
+def _solve(model, time_limit):
+    model.Params.OutputFlag = 0
+    model.Params.TimeLimit = time_limit
+    optimize_model(model)
+    if model.SolCount == 0:
+        raise RuntimeError(f'no solution found (status {model.status})')
+    return model
+
+
+def _robustness(infile):
+    return {
+        'degree': robustness_analysis.degree(infile)[2],
+        'betweenness': robustness_analysis.betweenness(infile)[2],
+        'closeness': robustness_analysis.closeness(infile)[2],
+        'random': robustness_analysis.rand(infile)[2],
+    }
+
+
+def run_size(size, work_dir, seed = 0, time_limit = 600, trace = False):
+    """
+    Runs the whole pipeline on a synthetic instance with size communities.
+    Returns {stage: {'time', 'max_rss_mb'}}, or with trace {stage:
+    {'peak_mb'}}; stages after a failure are skipped and the error is
+    stored under 'error'.
+    """
+
+    record = {}
+    data_dir = os.path.join(work_dir, str(size))
+    instance = generate_instance(size, seed = seed)
+    try:
+        _stage(record, 'distance', write_instance, *instance, data_dir, trace = trace)
+        data = _stage(record, 'ingest', load_data, None, data_dir, trace = trace)
+        model, x, z, y, w = _stage(record, 'model_build', build_model, data, trace = trace)
+        _stage(record, 'solve', _solve, model, time_limit, trace = trace)
+        values = {name: model.getAttr('X', var) for name, var in zip('xzyw', (x, z, y, w))}
+        solution = _stage(record, 'extraction', extract_solution, data, values, trace = trace)
+        model.dispose()
+        gml = os.path.join(data_dir, 'final_network_MAIN.gml')
+        _stage(record, 'graph_build',
+               lambda: networkx.write_gml(solution_network(data, solution), gml), trace = trace)
+        record['vulnerability'] = _stage(record, 'robustness', _robustness, gml, trace = trace)
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+    return record
+
+
+def compare(results, baseline, threshold = 0.25, min_time = MIN_TIME):
+    """
+    Compares results with baseline (both as stored by main). Returns the
+    list of regressions (size, stage, reason): a stage slower than the
+    baseline by more than threshold, a failed run, or a stage of the
+    baseline missing from the results (skipped after a failure).
+    """
+
+    regressions = []
+    for size, record in results['sizes'].items():
+        if 'error' in record:
+            regressions.append((size, 'error', record['error']))
+        for stage in STAGES:
+            base = baseline.get('sizes', {}).get(size, {}).get(stage)
+            if base is None:
+                continue
+            if stage not in record:
+                regressions.append((size, stage, 'missing from the results'))
+                continue
+            if base['time'] < min_time and record[stage]['time'] < min_time:
+                continue
+            if record[stage]['time'] > base['time'] * (1 + threshold):
+                regressions.append((size, stage, f"{record[stage]['time']:.3f}s vs "
+                                                  f"{base['time']:.3f}s baseline"))
+    return regressions
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 1:
+        print("python pipeline_benchmark.py <outfile.json> [baseline.json] [threshold] [sizes] [memory]")
+        sys.exit(0)
+
+    outfile = argv[0]
+    baseline_file = argv[1] if len(argv) > 1 and argv[1] else None
+    threshold = float(argv[2]) if len(argv) > 2 else 0.25
+    sizes = [int(s) for s in argv[3].split(',')] if len(argv) > 3 else [10, 100, 1000]
+    memory = argv[4] != "False" if len(argv) > 4 else True
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'node': platform.node(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'sizes': {},
+    }
+    work_dir = tempfile.mkdtemp(prefix = 'pipeline_benchmark_')
+    try:
+        for size in sizes:
+            record = run_size(size, work_dir)
+            if memory and 'error' not in record:
+                traced = run_size(size, work_dir, trace = True)
+                for stage in STAGES:
+                    if stage in record and stage in traced:
+                        record[stage].update(traced[stage])
+            results['sizes'][str(size)] = record
+            print(f'{size} communities: ' + ', '.join(
+                f"{stage} {record[stage]['time']:.3f}s"
+                + (f"/{record[stage]['peak_mb']:.1f}MB" if 'peak_mb' in record[stage] else '')
+                for stage in STAGES if stage in record))
+            if 'error' in record:
+                print(f"  stopped: {record['error']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors = True)
+
+    with open(outfile, 'w') as json_file:
+        json.dump(results, json_file, indent = 4)
+
+    if baseline_file is not None:
+        with open(baseline_file) as json_file:
+            baseline = json.load(json_file)
+        regressions = compare(results, baseline, threshold)
+        for size, stage, reason in regressions:
+            print(f'REGRESSION {size} communities, {stage}: {reason}')
+        if regressions:
+            sys.exit(1)
+        print(f'No stage regressed by more than {threshold:.0%}')
+    elif any('error' in record for record in results['sizes'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python pipeline_benchmark.py bench.json bench_baseline.json 0.25 10,100,1000 True
+# Windows: py pipeline_benchmark.py bench.json bench_baseline.json 0.25 10,100,1000 True
@@ -0,0 +1,270 @@
+"""
+Monte Carlo ensembles of random failures. rand() in robustness_analysis.py
+draws a single unseeded removal order, so its curve and V are one noisy
+sample. Here thousands of seeded random orders are run across a process
+pool, each worker with its own independent NumPy generator stream
+(SeedSequence.spawn), and every batch of trials is a single vectorized
+site percolation pass, O((n + m) alpha(n)) per trial. The result is the
+mean and percentile bands of sigma(rho) and the distribution of V.
+
+site_percolation is a Newman-Ziff site percolation on the integer edge
+arrays of a network, vectorized over a batch of realisations: one pass per
+batch gives the giant component size for every number of occupied nodes
+(0..n) of every realisation. An edge joins the network when its last
+endpoint is occupied, so the edges are processed in that order, with a
+union-find per realisation held in (realisations x n) arrays.
+
+Usage: python random_failures.py <infile> <outfile> [trials] [seed] [workers]
+"""
+
+import math, multiprocessing, os, random, sys
+import numpy, pylab
+
+from robustness_engine import load_network
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Network shared by the pool workers (set once per worker by _init)
+_network = None
+
+
+def _init(network):
+    global _network
+    _network = network
+
+
+##############################################
+######### NEWMAN-ZIFF SITE PERCOLATION #######
+##############################################
+
+def _find(parent, rows, x):
+    """
+    Roots of the nodes x (one per realisation in rows), with path halving.
+    """
+
+    while True:
+        p = parent[rows, x]
+        if (p == x).all():
+            return x
+        gp = parent[rows, p]
+        parent[rows, x] = gp
+        x = gp
+
+
+def site_percolation(network, orders):
+    """
+    Newman-Ziff site percolation of network (a robustness_engine.Network)
+    for a batch of occupation orders (realisations x n array, each row a
+    permutation of the node ids). Returns the giant component sizes, a
+    (realisations x n + 1) array whose column k is the size after k nodes
+    have been occupied.
+    """
+
+    orders = numpy.asarray(orders, dtype = numpy.int64)
+    R, n = orders.shape
+    rows = numpy.arange(R)
+
+    # Undirected edges (u < v) of the CSR adjacency
+    u = numpy.repeat(numpy.arange(n), numpy.diff(network.indptr))
+    v = network.indices
+    keep = u < v
+    u, v = u[keep], v[keep]
+
+    # Occupation time of every node and activation time of every edge
+    time = numpy.empty_like(orders)
+    time[rows[:, None], orders] = numpy.arange(n)
+    edge_time = numpy.maximum(time[:, u], time[:, v])
+    sort = numpy.argsort(edge_time, axis = 1, kind = 'stable')
+    edge_time = numpy.take_along_axis(edge_time, sort, axis = 1)
+    eu, ev = u[sort], v[sort]
+
+    parent = numpy.tile(numpy.arange(n), (R, 1))
+    size = numpy.ones((R, n), dtype = numpy.int64)
+    largest = numpy.ones(R, dtype = numpy.int64)
+    after_edge = numpy.empty((R, len(u)), dtype = numpy.int64)
+    for e in range(len(u)):
+        a = _find(parent, rows, eu[:, e])
+        b = _find(parent, rows, ev[:, e])
+        merge = a != b
+        if merge.any():
+            r, a, b = rows[merge], a[merge], b[merge]
+            swap = size[r, a] < size[r, b]
+            a, b = numpy.where(swap, b, a), numpy.where(swap, a, b)
+            parent[r, b] = a
+            size[r, a] += size[r, b]
+            largest[r] = numpy.maximum(largest[r], size[r, a])
+        after_edge[:, e] = largest
+
+    # Giant after k occupied nodes: after the last edge active by then
+    # (edges active at time t are in place once t + 1 nodes are occupied)
+    sizes = numpy.zeros((R, n + 1), dtype = numpy.int64)
+    for r in range(R):
+        active = numpy.searchsorted(edge_time[r], numpy.arange(n), side = 'right')
+        sizes[r, 1:] = numpy.where(active > 0, after_edge[r, numpy.maximum(active - 1, 0)], 1)
+    return sizes
+
+
+def removal_sizes(network, orders):
+    """
+    Largest component sizes after removing the first i nodes of each
+    removal order, for i = 0..n-1 (the layout of
+    robustness_engine.largest_component_sizes), through site_percolation of
+    the reversed orders.
+    """
+
+    orders = numpy.asarray(orders, dtype = numpy.int64)
+    n = orders.shape[1]
+    sizes = site_percolation(network, orders[:, ::-1])
+    # i removals leave n - i occupied nodes
+    return sizes[:, n:0:-1]
+
+
+def canonical(sizes, p):
+    """
+    Canonical giant component curve S(p) (fraction of nodes) from the
+    microcanonical sizes of site_percolation (one row, or the mean of
+    several), by convolution with the binomial distribution of the number
+    of occupied nodes at occupation probability p.
+    """
+
+    sizes = numpy.asarray(sizes, dtype = float)
+    if sizes.ndim > 1:
+        sizes = sizes.mean(axis = 0)
+    n = len(sizes) - 1
+    k = numpy.arange(n + 1)
+    log_choose = numpy.array([math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1)
+                              for i in k])
+    S = []
+    for q in numpy.atleast_1d(p):
+        if q <= 0 or q >= 1:
+            S.append(sizes[-1 if q >= 1 else 0] / n)
+            continue
+        weights = numpy.exp(log_choose + k * math.log(q) + (n - k) * math.log(1 - q))
+        S.append((weights * sizes).sum() / n)
+    return numpy.array(S)
+
+
+def rand(infile, seed = None):
+    """
+    Same as robustness_analysis.rand (one random removal order, n - 1
+    removals), with the curve obtained by site percolation. Without seed
+    the global random generator is used, as in robustness_engine.rand.
+    """
+
+    network = load_network(infile)
+    order = list(range(network.n))
+    if seed is None:
+        random.shuffle(order)
+    else:
+        random.Random(seed).shuffle(order)
+    sizes = removal_sizes(network, [order])[0]
+    n = network.n
+    x = [i * 1. / n for i in range(n)]
+    y = (sizes / n).tolist()
+    return x, y, 0.5 - sum(y[1:]) / n
+
+
+##############################################
+############# RANDOM FAILURE ENSEMBLE ########
+##############################################
+
+def _trials(seed_sequence, trials):
+    """
+    Runs trials random removal orders drawn from the generator of
+    seed_sequence, as one batch of site percolation. Returns the largest
+    component sizes, one row per trial.
+    """
+
+    rng = numpy.random.default_rng(seed_sequence)
+    n = _network.n
+    orders = numpy.array([rng.permutation(n) for _ in range(trials)])
+    return removal_sizes(_network, orders)
+
+
+def ensemble(network, trials = 1000, seed = 0, workers = None, percentiles = PERCENTILES,
+             chunk = 50):
+    """
+    Random failure ensemble of trials seeded removal orders on network (a
+    robustness_engine.Network), split in chunks of trials over a pool of
+    workers processes. Returns a dictionary with x (fraction of nodes
+    removed), the mean and percentile bands of sigma, and the V of every
+    trial with its mean and percentiles. Results only depend on seed and
+    chunk, not on the number of workers.
+    """
+
+    n = network.n
+    counts = [chunk] * (trials // chunk) + ([trials % chunk] if trials % chunk else [])
+    streams = numpy.random.SeedSequence(seed).spawn(len(counts))
+
+    if workers == 1:
+        _init(network)
+        blocks = [_trials(s, c) for s, c in zip(streams, counts)]
+    else:
+        with multiprocessing.Pool(workers, initializer = _init, initargs = (network,)) as pool:
+            blocks = pool.starmap(_trials, zip(streams, counts))
+    sizes = numpy.vstack(blocks)
+
+    # Same quantities as rand(): n - 1 removals, V = 0.5 - R / n
+    y = sizes / n
+    V = 0.5 - y[:, 1:].sum(axis = 1) / n
+    return {
+        'x': numpy.arange(n) / n,
+        'mean': y.mean(axis = 0),
+        'percentiles': {p: numpy.percentile(y, p, axis = 0) for p in percentiles},
+        'V': V,
+        'V_mean': V.mean(),
+        'V_percentiles': {p: numpy.percentile(V, p) for p in percentiles},
+    }
+
+
+def plot_ensemble(result, outfile):
+    """
+    Plots the mean curve with its 5-95 and 25-75 percentile bands, and the
+    distribution of V as an inset.
+    """
+
+    x, bands = result['x'], result['percentiles']
+    pylab.figure(1, dpi = 500)
+    pylab.xlabel(r"Fraction of vertices removed ($\rho$)")
+    pylab.ylabel(r"Fractional size of largest component ($\sigma$)")
+    pylab.fill_between(x, bands[5], bands[95], color = "k", alpha = 0.15, linewidth = 0)
+    pylab.fill_between(x, bands[25], bands[75], color = "k", alpha = 0.3, linewidth = 0)
+    pylab.plot(x, result['mean'], "k-", alpha = 0.8, linewidth = 2.0)
+    pylab.legend((r"Random, mean ($V = %4.3f$)" %(result['V_mean']),
+                  "5-95%", "25-75%"), loc = "upper right", shadow = False)
+
+    pylab.axes([0.6, 0.35, 0.25, 0.2])
+    pylab.hist(result['V'], bins = 30, color = "k", alpha = 0.6)
+    pylab.xlabel(r"$V$")
+    pylab.yticks([])
+
+    pylab.savefig(outfile, format = "pdf")
+    pylab.close(1)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python random_failures.py <infile> <outfile> [trials] [seed] [workers]")
+        sys.exit(0)
+
+    infile, outfile = argv[0], argv[1]
+    trials = int(argv[2]) if len(argv) > 2 else 1000
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    workers = int(argv[4]) if len(argv) > 4 else os.cpu_count()
+
+    result = ensemble(load_network(infile), trials, seed, workers)
+    V = result['V_percentiles']
+    print(f"V over {trials} random failures: mean {result['V_mean']:.4f}, "
+          f"median {V[50]:.4f}, 5-95% [{V[5]:.4f}, {V[95]:.4f}]")
+    plot_ensemble(result, outfile)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python random_failures.py final_network_MAIN.gml final_output_Random.pdf 5000 42
+# Windows: py random_failures.py final_network_MAIN.gml final_output_Random.pdf 5000 42
@@ -1,27 +1,32 @@
-import igraph, networkx, numpy, operator, pylab, random, sys
-import pandas as pd
+import networkx, operator, os, random, sys
+import robustness_engine, robustness_results
 
-# Sample Network to be ingested into the functions
-G = networkx.Graph()
-G.add_nodes_from(range(1, 16))
+def sample_network(outfile = "sample_network.gml"):
+    """
+    Writes the sample network (clusters joined by bridges) to be ingested
+    into the functions to outfile. Only run from the command line, so that
+    importing this module has no side effects.
+    """
 
-# defining edges to form clusters and connect them
-edges = [
-    (1, 2), (1, 3), (2, 3),  # Cluster 1
-    (4, 5), (5, 6), (6, 4), (4, 7),  # Cluster 2 with a bridge node 7
-    (8, 9), (9, 10), (10, 8),  # Cluster 3
-    (11, 12), (12, 13), (13, 11),  # Cluster 4
-    (14, 15),  # Small two-node connection
-    (3, 7), (7, 10), (10, 13),  # Bridges connecting clusters
-    (1, 14), (5, 15)  # Random links for added robustness
-]
+    G = networkx.Graph()
+    G.add_nodes_from(range(1, 16))
 
-# Adding the edges to the graph
-G.add_edges_from(edges)
+    # defining edges to form clusters and connect them
+    edges = [
+        (1, 2), (1, 3), (2, 3),  # Cluster 1
+        (4, 5), (5, 6), (6, 4), (4, 7),  # Cluster 2 with a bridge node 7
+        (8, 9), (9, 10), (10, 8),  # Cluster 3
+        (11, 12), (12, 13), (13, 11),  # Cluster 4
+        (14, 15),  # Small two-node connection
+        (3, 7), (7, 10), (10, 13),  # Bridges connecting clusters
+        (1, 14), (5, 15)  # Random links for added robustness
+    ]
 
-# Save this graph to a GML file to be used in your robustness analysis
-networkx.write_gml(G, "sample_network.gml")
+    # Adding the edges to the graph
+    G.add_edges_from(edges)
 
+    # Save this graph to a GML file to be used in your robustness analysis
+    networkx.write_gml(G, outfile)
 
 ##########
 # Combined Matrix Output from Optimization Model
@@ -42,7 +47,7 @@ def betweenness(infile, recalculate = False):
     of the network.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.betweenness_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
     x = []
@@ -71,10 +76,10 @@ def betweenness_fracture(infile, outfile, fraction, recalculate = False):
     after each node removal) and saves the network in outfile.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.betweenness_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
-    largest_component = max(networkx.connected_components(g), key = len)
+    largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
     n = len(g.nodes())
     for i in range(1, n):
         g.remove_node(l.pop(0)[0])
@@ -82,14 +87,14 @@ def betweenness_fracture(infile, outfile, fraction, recalculate = False):
             m = networkx.betweenness_centrality(g)
             l = sorted(m.items(), key = operator.itemgetter(1), 
                        reverse = True)
-        largest_component = max(networkx.connected_components(g), key = len)
+        largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
         if i * 1. / n >= fraction:
             break
-    components = networkx.connected_components(g)
+    components = networkx.connected_components(g.to_undirected())
     component_id = 1
     for component in components:
         for node in component:
-            g.node[node]["component"] = component_id
+            g.nodes[node]["component"] = component_id
         component_id += 1
     networkx.write_gml(g, outfile)
 
@@ -103,7 +108,7 @@ def closeness(infile, recalculate = False):
     of the network.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.closeness_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
     x = []
@@ -132,10 +137,10 @@ def closeness_fracture(infile, outfile, fraction, recalculate = False):
     after each node removal) and saves the network in outfile.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.closeness_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
-    largest_component = max(networkx.connected_components(g), key = len)
+    largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
     n = len(g.nodes())
     for i in range(1, n):
         g.remove_node(l.pop(0)[0])
@@ -143,14 +148,14 @@ def closeness_fracture(infile, outfile, fraction, recalculate = False):
             m = networkx.closeness_centrality(g)
             l = sorted(m.items(), key = operator.itemgetter(1), 
                        reverse = True)
-        largest_component = max(networkx.connected_components(g), key = len)
+        largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
         if i * 1. / n >= fraction:
             break
-    components = networkx.connected_components(g)
+    components = networkx.connected_components(g.to_undirected())
     component_id = 1
     for component in components:
         for node in component:
-            g.node[node]["component"] = component_id
+            g.nodes[node]["component"] = component_id
         component_id += 1
     networkx.write_gml(g, outfile)
 
@@ -164,7 +169,7 @@ def degree(infile, recalculate = False):
     of the network.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.degree_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
     x = []
@@ -193,10 +198,10 @@ def degree_fracture(infile, outfile, fraction, recalculate = False):
     after each node removal) and saves the network in outfile.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     m = networkx.degree_centrality(g)
     l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
-    largest_component = max(networkx.connected_components(g), key = len)
+    largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
     n = len(g.nodes())
     for i in range(1, n - 1):
         g.remove_node(l.pop(0)[0])
@@ -204,14 +209,14 @@ def degree_fracture(infile, outfile, fraction, recalculate = False):
             m = networkx.degree_centrality(g)
             l = sorted(m.items(), key = operator.itemgetter(1), 
                        reverse = True)
-        largest_component = max(networkx.connected_components(g), key = len)
+        largest_component = max(networkx.connected_components(g.to_undirected()), key = len)
         if i * 1. / n >= fraction:
             break
-    components = networkx.connected_components(g)
+    components = networkx.connected_components(g.to_undirected())
     component_id = 1
     for component in components:
         for node in component:
-            g.node[node]["component"] = component_id
+            g.nodes[node]["component"] = component_id
         component_id += 1
     networkx.write_gml(g, outfile)
 
@@ -225,43 +230,9 @@ def eigenvector(infile, recalculate = False):
     of the network.
     """
 
-    def indexof(g, s):
-        vs = g.vs()
-        for i in range(0, len(vs)):
-            v = vs[i]
-            if v["label"] == s:
-                return i
-        return None
-
-    g = igraph.Graph.Read_GML(infile)
-    vs = g.vs()
-    m = {}
-    el = g.eigenvector_centrality()
-    for i in range(0, len(vs)):
-        m[vs[i]["label"]] = float(el[i])
-    l = m.items()
-    l = sorted(l, key = operator.itemgetter(1), reverse = True)
-    x = []
-    y = []
-    largest_component = g.components().giant().vcount()
-    n = g.vcount()
-    x.append(0)
-    y.append(largest_component * 1. / n)
-    R = 0.0
-    for i in range(1, n):
-        g.delete_vertices(indexof(g, l.pop(0)[0]))
-        if recalculate:
-            m = {}
-            el = g.eigenvector_centrality()
-            for j in range(0, len(vs)):
-                m[vs[j]["label"]] = float(el[j])
-            l = m.items()
-            l = sorted(l, key = operator.itemgetter(1), reverse = True)
-        largest_component = g.components().giant().vcount()
-        x.append(i * 1. / n)
-        R += largest_component * 1. / n
-        y.append(largest_component * 1. / n)
-    return x, y, 0.5 - R / n
+    # Centralities from the deterministic solver of robustness_engine
+    # (ties in node order); components are weak, as in the other attacks
+    return robustness_engine.attack(infile, 'eigenvector', recalculate)
 
 def eigenvector_fracture(infile, outfile, fraction, recalculate = False):
     """
@@ -270,43 +241,20 @@ def eigenvector_fracture(infile, outfile, fraction, recalculate = False):
     after each node removal) and saves the network in outfile.
     """
 
-    def indexof(g, s):
-        vs = g.vs()
-        for i in range(0, len(vs)):
-            v = vs[i]
-            if v["label"] == s:
-                return i
-        return None
-
-    g = igraph.Graph.Read_GML(infile)
-    vs = g.vs()
-    m = {}
-    el = g.eigenvector_centrality()
-    for i in range(0, len(vs)):
-        m[vs[i]["label"]] = float(el[i])
-    l = m.items()
-    l = sorted(l, key = operator.itemgetter(1), reverse = True)
-    largest_component = g.components().giant().vcount()
-    n = g.vcount()
-    for i in range(1, n):
-        g.delete_vertices(indexof(g, l.pop(0)[0]))
-        if recalculate:
-            m = {}
-            el = g.eigenvector_centrality()
-            for j in range(0, len(vs)):
-                m[vs[j]["label"]] = float(el[j])
-            l = m.items()
-            l = sorted(l, key = operator.itemgetter(1), reverse = True)
-        largest_component = g.components().giant().vcount()
-        if i * 1. / n >= fraction:
-            break
-    components = g.components()
-    component_id = 1
-    for component in components:
-        for node in component:
-            vs[node]["component"] = component_id
-        component_id += 1
-    g.write_gml(outfile)
+    # outfile is a literal path, not a fracture_snapshots pattern
+    pattern = outfile.replace('{', '{{').replace('}', '}}')
+    robustness_engine.fracture_snapshots(infile, pattern, [fraction], 'eigenvector', recalculate)
+
+
+def fracture(infile, outfile, fractions, strategy = "degree", recalculate = False):
+    """
+    Removes each given fraction of nodes from infile network in reverse
+    order of the strategy centrality, as the *_fracture functions, with a
+    single removal sequence for all fractions. outfile is a pattern such as
+    "fracture_{strategy}_{fraction}.gml". Returns the paths written.
+    """
+
+    return robustness_engine.fracture_snapshots(infile, outfile, fractions, strategy, recalculate)
 
 
 # Random attacks in the network simulating potential damages after an earthquake
@@ -319,7 +267,7 @@ def rand(infile):
     network, and the overall vulnerability of the network.
     """
 
-    g = networkx.read_gml(infile)
+    g = robustness_engine.as_networkx(infile)
     l = [(node, 0) for node in g.nodes()]
     random.shuffle(l)
     x = []
@@ -343,8 +291,8 @@ def main(argv):
     Entry point.
     """
 
-    if len(argv) != 3:
-        print("python robustness.py <infile> <outfile> <recalculate>")
+    if len(argv) not in (3, 4):
+        print("python robustness.py <infile> <outfile> <recalculate> [seed]")
         sys.exit(0)
 
     infile = argv[0]
@@ -353,59 +301,43 @@ def main(argv):
         recalculate = True
     else:
         recalculate = False
-    x1, y1, VD = degree(infile, recalculate)
-    x2, y2, VB = betweenness(infile, recalculate)
-    x3, y3, VC = closeness(infile, recalculate)
-    #x4, y4, VE = eigenvector(infile, recalculate)
-    x5, y5, VR = rand(infile)
-
-    pylab.figure(1, dpi = 500)
-    pylab.xlabel(r"Fraction of vertices removed ($\rho$)")
-    pylab.ylabel(r"Fractional size of largest component ($\sigma$)")
-    pylab.plot(x1, y1, "b-", alpha = 0.6, linewidth = 2.0)
-    pylab.plot(x2, y2, "g-", alpha = 0.6, linewidth = 2.0)
-    pylab.plot(x3, y3, "r-", alpha = 0.6, linewidth = 2.0)
-    #pylab.plot(x4, y4, "c-", alpha = 0.6, linewidth = 2.0)
-    pylab.plot(x5, y5, "k-", alpha = 0.6, linewidth = 2.0)
-    pylab.legend((r"Degree ($V = %4.3f$)" %(VD), 
-                  "Betweenness ($V = %4.3f$)" %(VB), 
-                  "Closeness ($V = %4.3f$)" %(VC), 
-                  #"Eigenvector ($V = %4.3f$)" %(VE), 
-                  "Random ($V = %4.3f$)" %(VR)), 
-                 loc = "upper right", shadow = False)
-
-    # Inset showing vulnerability values.
-    # labels = [r"$D$", r"$B$", r"$C$", r"$E$", r"$R$"]
-    labels = [r"$D$", r"$B$", r"$C$", r"$R$"]
-    #labels = [r"$R$"]
-
-    # V = [VD, VB, VC, VE, VR]
-    V = [VD, VB, VC, VR]
-    #V = [VR]
-    xlocations = numpy.array(range(len(V)))+0.2
-    width = 0.2
-    inset = pylab.axes([0.735, 0.45, 0.15, 0.15])
-    pylab.bar(xlocations, V, color = ["b", "g", "r", "c", "k"], 
-              alpha = 0.6, width = width)
-    pylab.yticks([0.0, 0.25, 0.5])
-    pylab.xticks(xlocations + width / 2, labels)
-    pylab.xlim(0, xlocations[-1] + width * 2)
-    pylab.ylabel(r"$V$")
-
-    pylab.savefig(outfile, format = "pdf")
-    pylab.close(1)
+    # Seed of the random attack, part of the key of the stored curves so
+    # that a stored random curve is only reused for the same seed
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    # Same curves as degree(), betweenness(), closeness(), eigenvector() and
+    # rand() above, computed concurrently on the network loaded once in
+    # memory (see robustness_engine.py), or read back from a previous run
+    # on the same network (see robustness_results.py); plotting starts once
+    # every curve is in
+    strategies = ['degree', 'betweenness', 'closeness', 'eigenvector', 'random']
+    results = robustness_results.result_path(robustness_results.file_hash(infile),
+                                             strategies = strategies, recalculate = recalculate,
+                                             seed = seed)
+    if os.path.exists(results):
+        curves, _ = robustness_results.load_results(results)
+        print(f"Curves read from {results}")
+    else:
+        network = robustness_engine.load_network(infile)
+        curves, timings = robustness_engine.run_parallel(network, recalculate, strategies, seed)
+        for strategy, elapsed in timings.items():
+            print(f"{strategy}: {elapsed:.3f}s")
+        robustness_results.save_results(results, curves, infile = infile,
+                                        recalculate = recalculate, seed = seed)
+        print(f"Curves saved to {results}")
+
+    robustness_results.render(curves, outfile)
 
 
 if __name__ == "__main__":
+    sample_network()
     main(sys.argv[1:])
 
-
-# 1st Install this libraries using pip. Check out Quito's code
-print("Success")
+    # 1st Install this libraries using pip. Check out Quito's code
+    print("Success")
 
 # Windows: py robustness_analysis.py 'sample_network.gml'
 # Mac: python robustness_analysis.py 'sample_network.gml'
-# python robustness.py <infile> <outfile> <recalculate>
+# python robustness.py <infile> <outfile> <recalculate> [seed]
 # python robustness_analysis.py 'sample_network.gml' 'sample_output.pdf' True
 # python robustness_analysis.py 'final_network_nobackup.gml' 'final_output_nobk1.pdf' True
 # python robustness_analysis.py 'final_network.gml' 'final_output_1.pdf' True
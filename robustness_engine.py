@@ -0,0 +1,972 @@
+"""
+Fast engine for the robustness curves of robustness_analysis.py.
+
+The original functions recompute the largest component of an undirected
+copy of the network after every removal, which is O(n (n + m)) per curve.
+Once the removal order is known (up front for simultaneous attacks, or
+after the centrality recalculations for sequential ones), the whole curve
+can be obtained by replaying the removals in reverse: nodes are added back
+one by one and merged with their present neighbours in a union-find, which
+keeps the size of the largest component. This costs O((n + m) alpha(n)).
+
+degree, betweenness, closeness and rand have the same signature and return
+exactly the same (x, y, V) as their robustness_analysis.py counterparts.
+
+load_network reads a GML file once, with igraph, into a Network (arrays
+plus a persistent label -> id map); attack and run_strategies then run
+every strategy from that in-memory network. Removed nodes are tracked with
+a boolean mask: centralities are recomputed on the induced subgraph of the
+nodes still alive, whose vertices map back to the original ids, so no
+label lookup or reindexing is needed.
+
+run_parallel computes the strategies concurrently in a process pool: the
+Network is shipped once to each worker in its compact array form (the
+igraph graph is rebuilt from the arrays there), and the timing of every
+strategy is reported.
+
+fracture_snapshots writes the fractured networks of the *_fracture
+functions for several fractions from a single removal sequence.
+
+as_network, as_networkx and as_igraph accept a network in any of the forms
+at hand: a GML path, a networkx or igraph graph (e.g. the solution network
+of opt_model.solution_network, without writing it), or a (nodes, edges)
+pair. The attack functions of this module and of robustness_analysis.py
+take any of them, so the optimization and the analysis can run in one
+process with the node labels keeping their types (the main warehouse stays
+160001, where a GML round trip gives "160001").
+
+directed_curve adds the direction of the links, ignored by weak
+connectivity: the fraction of nodes still reachable from the supply
+sources (main warehouse and opened warehouses) is maintained decrementally
+with DecrementalReachability alongside the curve.
+"""
+
+import heapq, html, multiprocessing, operator, os, random, time, warnings
+import igraph, networkx, numpy, scipy.sparse, scipy.sparse.csgraph, scipy.sparse.linalg
+
+
+class UnionFind:
+    """
+    Disjoint sets over the node ids 0..n-1, with union by size and path
+    halving. Only nodes that have been added are part of a set; largest
+    is the size of the largest set.
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [0] * n
+        self.largest = 0
+
+    def add(self, v):
+        self.size[v] = 1
+        if self.largest < 1:
+            self.largest = 1
+
+    def find(self, v):
+        parent = self.parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        if self.size[a] > self.largest:
+            self.largest = self.size[a]
+        return a
+
+
+class Network:
+    """
+    Compact array form of a network: node labels with a label -> id map,
+    the (directed) edge arrays, and the undirected adjacency in CSR form
+    (indptr, indices) used for weak connectivity. colors keeps the color
+    attribute of the nodes (node type in the networks of main.py), if any.
+    """
+
+    def __init__(self, labels, sources, targets, directed = True):
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.n = len(self.labels)
+        self.directed = directed
+        self.colors = None
+        self.sources = numpy.asarray(sources, dtype = numpy.int64)
+        self.targets = numpy.asarray(targets, dtype = numpy.int64)
+
+        # Undirected CSR without self loops and duplicates
+        keep = self.sources != self.targets
+        u = numpy.concatenate((self.sources[keep], self.targets[keep]))
+        v = numpy.concatenate((self.targets[keep], self.sources[keep]))
+        pairs = numpy.unique(u * max(self.n, 1) + v)
+        u, v = pairs // max(self.n, 1), pairs % max(self.n, 1)
+        self.indptr = numpy.zeros(self.n + 1, dtype = numpy.int64)
+        numpy.cumsum(numpy.bincount(u, minlength = self.n), out = self.indptr[1:])
+        self.indices = v
+
+    @classmethod
+    def from_networkx(cls, g):
+        """
+        Builds the array form of the networkx graph g.
+        """
+
+        labels = list(g.nodes())
+        index = {label: i for i, label in enumerate(labels)}
+        edges = numpy.array([(index[a], index[b]) for a, b in g.edges()],
+                            dtype = numpy.int64).reshape(-1, 2)
+        network = cls(labels, edges[:, 0], edges[:, 1], g.is_directed())
+        colors = [g.nodes[label].get('color') for label in labels]
+        if any(color is not None for color in colors):
+            network.colors = colors
+        return network
+
+    @classmethod
+    def from_igraph(cls, g):
+        """
+        Builds the array form of the igraph graph g. Labels are taken from
+        the '_nx_name' (igraph.Graph.from_networkx), 'label' (GML) or 'name'
+        vertex attribute, with the character references igraph leaves in GML
+        labels (e.g. "&#243;") decoded, so they match networkx labels.
+        """
+
+        if '_nx_name' in g.vs.attributes():
+            labels = g.vs['_nx_name']
+        elif 'label' in g.vs.attributes():
+            labels = [html.unescape(label) if isinstance(label, str) else label
+                      for label in g.vs['label']]
+        elif 'name' in g.vs.attributes():
+            labels = g.vs['name']
+        else:
+            labels = list(range(g.vcount()))
+        edges = numpy.array(g.get_edgelist(), dtype = numpy.int64).reshape(-1, 2)
+        network = cls(labels, edges[:, 0], edges[:, 1], g.is_directed())
+        if 'color' in g.vs.attributes():
+            network.colors = g.vs['color']
+        network._igraph = g
+        return network
+
+    def __getstate__(self):
+        # Only the arrays are shipped to other processes; the igraph graph
+        # is rebuilt there on first use
+        state = self.__dict__.copy()
+        state.pop('_igraph', None)
+        return state
+
+    def igraph(self, alive = None):
+        """
+        igraph graph of the network, built once and kept. With a boolean
+        mask alive, returns the subgraph induced by the nodes alive and the
+        array mapping its vertices to the network ids.
+        """
+
+        if getattr(self, '_igraph', None) is None:
+            self._igraph = igraph.Graph(n = self.n, directed = self.directed,
+                                        edges = numpy.column_stack((self.sources, self.targets)).tolist())
+        if alive is None:
+            return self._igraph
+        ids = numpy.flatnonzero(alive)
+        return self._igraph.induced_subgraph(ids.tolist(), implementation = 'create_from_scratch'), ids
+
+    def adjacency(self):
+        """
+        Undirected adjacency as a list of neighbour lists (fastest form for
+        pure Python loops).
+        """
+
+        indptr, indices = self.indptr.tolist(), self.indices.tolist()
+        return [indices[indptr[v]:indptr[v + 1]] for v in range(self.n)]
+
+
+def largest_component_sizes(network, order):
+    """
+    Sizes of the largest (weakly connected) component of network after
+    removing the first i nodes of order, for i = 0..n-1. order is a
+    permutation of the node ids. Reverse replay with union-find.
+    """
+
+    n = network.n
+    adjacency = network.adjacency()
+    uf = UnionFind(n)
+    present = [False] * n
+    sizes = [0] * n
+    for i in range(n - 1, -1, -1):
+        v = order[i]
+        uf.add(v)
+        present[v] = True
+        for u in adjacency[v]:
+            if present[u]:
+                uf.union(u, v)
+        sizes[i] = uf.largest
+    return sizes
+
+
+def curve(network, order, removals = None):
+    """
+    Robustness curve of network for the removal order (node ids): returns
+    the fractions of nodes removed, the fractional sizes of the largest
+    component and the vulnerability V, for removals nodes removed (n - 1 by
+    default), with the same arithmetic as robustness_analysis.py.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    sizes = largest_component_sizes(network, order)
+    x = [0]
+    y = [sizes[0] * 1. / n]
+    R = 0.0
+    for i in range(1, removals + 1):
+        x.append(i * 1. / n)
+        R += sizes[i] * 1. / n
+        y.append(sizes[i] * 1. / n)
+    return x, y, 0.5 - R / n
+
+
+def centrality_order(g, centrality, recalculate = False, removals = None):
+    """
+    Removal order (labels) of the attack on g (which is modified when
+    recalculate is True) in reverse order of centrality, a function such as
+    networkx.degree_centrality. With recalculate, the centrality is
+    recomputed after each of the first removals removals, as in
+    robustness_analysis.py. Ties keep the node order of the graph.
+    """
+
+    m = centrality(g)
+    l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
+    if not recalculate:
+        return [label for label, _ in l]
+
+    if removals is None:
+        removals = len(l) - 1
+    order = []
+    for i in range(1, removals + 1):
+        label = l.pop(0)[0]
+        order.append(label)
+        g.remove_node(label)
+        if i < removals:
+            m = centrality(g)
+            l = sorted(m.items(), key = operator.itemgetter(1), reverse = True)
+    # The nodes never removed are present in every state of the curve
+    return order + [label for label, _ in l]
+
+
+def _attack(infile, centrality, recalculate, removals_offset = 1):
+    g = as_networkx(infile)
+    network = Network.from_networkx(g)
+    removals = network.n - removals_offset
+    order = centrality_order(g, centrality, recalculate, removals)
+    return curve(network, [network.index[label] for label in order], removals)
+
+
+def betweenness(infile, recalculate = False):
+    """
+    Same as robustness_analysis.betweenness, with the curve obtained by
+    reverse union-find.
+    """
+
+    return _attack(infile, networkx.betweenness_centrality, recalculate)
+
+
+def closeness(infile, recalculate = False):
+    """
+    Same as robustness_analysis.closeness, with the curve obtained by
+    reverse union-find.
+    """
+
+    return _attack(infile, networkx.closeness_centrality, recalculate)
+
+
+def degree(infile, recalculate = False):
+    """
+    Same as robustness_analysis.degree (which stops at n - 2 removals), with
+    the curve obtained by reverse union-find.
+    """
+
+    return _attack(infile, networkx.degree_centrality, recalculate, removals_offset = 2)
+
+
+def rand(infile, seed = None):
+    """
+    Same as robustness_analysis.rand, with the curve obtained by reverse
+    union-find. Without seed the global random generator is used, so that
+    random.seed() reproduces the original function.
+    """
+
+    g = as_networkx(infile)
+    network = Network.from_networkx(g)
+    l = [(node, 0) for node in g.nodes()]
+    if seed is None:
+        random.shuffle(l)
+    else:
+        random.Random(seed).shuffle(l)
+    return curve(network, [network.index[label] for label, _ in l])
+
+
+##############################################
+############ FRACTURE SNAPSHOTS ##############
+##############################################
+
+def fracture_removals(n, fraction, last):
+    """
+    Number of nodes removed by the *_fracture functions of
+    robustness_analysis.py for fraction: the first i >= 1 with i / n >=
+    fraction, at most last.
+    """
+
+    for i in range(1, last + 1):
+        if i * 1. / n >= fraction:
+            return i
+    return last
+
+
+def component_snapshots(network, order, counts):
+    """
+    Component labels of the nodes left after removing the first k nodes of
+    order, for every k in counts, in a single reverse union-find replay.
+    Yields (k, labels) in decreasing k, labels mapping the node ids left to
+    component ids 1, 2, ... numbered in node order.
+    """
+
+    n = network.n
+    adjacency = network.adjacency()
+    uf = UnionFind(n)
+    present = [False] * n
+    pending = sorted(set(counts), reverse = True)
+    i = n
+    for k in pending:
+        while i > k:
+            i -= 1
+            v = order[i]
+            uf.add(v)
+            present[v] = True
+            for u in adjacency[v]:
+                if present[u]:
+                    uf.union(u, v)
+        ids, labels = {}, {}
+        for v in range(n):
+            if present[v]:
+                root = uf.find(v)
+                labels[v] = ids.setdefault(root, len(ids) + 1)
+        yield k, labels
+
+
+def fracture_snapshots(infile, outfile, fractions, strategy = 'degree', recalculate = False,
+                       seed = None):
+    """
+    Multi-fraction version of the *_fracture functions of
+    robustness_analysis.py: the removal sequence of strategy is computed
+    once, the components at every fraction are labelled in one union-find
+    pass, and each snapshot (the remaining network with a "component"
+    attribute) is written to outfile.format(strategy = strategy, fraction
+    = fraction) as soon as it is ready. Returns {fraction: path}.
+    """
+
+    g = as_networkx(infile)
+    network = Network.from_networkx(g)
+    n = network.n
+    last = n - REMOVALS_OFFSET.get(strategy, 1)
+    order = attack_order(network, strategy, recalculate, last, seed)
+    counts = {fraction: fracture_removals(n, fraction, last) for fraction in fractions}
+
+    paths = {}
+    for k, labels in component_snapshots(network, order, counts.values()):
+        sub = g.subgraph([network.labels[v] for v in labels]).copy()
+        for v, component in labels.items():
+            sub.nodes[network.labels[v]]["component"] = component
+        for fraction in [f for f, count in counts.items() if count == k]:
+            path = outfile.format(strategy = strategy, fraction = fraction)
+            networkx.write_gml(sub, path)
+            paths[fraction] = path
+    return paths
+
+
+##############################################
+########### DIRECTED REACHABILITY ############
+##############################################
+
+class DecrementalReachability:
+    """
+    Nodes reachable from the roots (node ids) in a directed graph on the
+    node ids 0..n-1 given by its edge arrays, under node removals (an
+    Even-Shiloach structure). Every node keeps its BFS level from the
+    nearest root (n for unreachable nodes) and its support, the number of
+    in-neighbours one level below it. Removing a node only decrements the
+    support of its out-neighbours; nodes left without support are raised to
+    their next supported level, and those pushed to n are unreachable.
+    covered is the total weight (1 per node by default) of the reachable
+    nodes.
+    """
+
+    def __init__(self, n, sources, targets, roots, weights = None):
+        self.n = n
+        keep = numpy.asarray(sources) != numpy.asarray(targets)
+        pairs = numpy.unique(numpy.asarray(sources)[keep] * max(n, 1) + numpy.asarray(targets)[keep])
+        u, v = (pairs // max(n, 1)).tolist(), (pairs % max(n, 1)).tolist()
+        self.out = [[] for _ in range(n)]
+        self.inc = [[] for _ in range(n)]
+        for a, b in zip(u, v):
+            self.out[a].append(b)
+            self.inc[b].append(a)
+        self.weight = [1.0] * n if weights is None else [float(w) for w in weights]
+        self.alive = [True] * n
+        self.roots = set(roots)
+
+        # BFS levels and supports
+        self.level = [n] * n
+        frontier = list(self.roots)
+        for r in frontier:
+            self.level[r] = 0
+        d = 0
+        while frontier:
+            d += 1
+            nxt = []
+            for a in frontier:
+                for b in self.out[a]:
+                    if self.level[b] == n:
+                        self.level[b] = d
+                        nxt.append(b)
+            frontier = nxt
+        self.support = [0] * n
+        for a, b in zip(u, v):
+            if self.level[a] < n and self.level[b] == self.level[a] + 1:
+                self.support[b] += 1
+        self.covered = sum(w for w, l in zip(self.weight, self.level) if l < n)
+
+    def reachable(self, v):
+        return self.alive[v] and self.level[v] < self.n
+
+    def remove(self, v):
+        """
+        Removes node v. Returns the nodes that became unreachable.
+        """
+
+        n, level, support, alive = self.n, self.level, self.support, self.alive
+        if not alive[v]:
+            return []
+        alive[v] = False
+        self.roots.discard(v)
+        lost = []
+        if level[v] < n:
+            self.covered -= self.weight[v]
+            lost.append(v)
+
+        queue = []
+        self._release(v, level[v], queue)
+        level[v] = n
+        while queue:
+            _, w = heapq.heappop(queue)
+            if support[w] > 0 or level[w] >= n:
+                continue
+            # Next level supported by the alive in-neighbours
+            old = level[w]
+            best = min((level[a] for a in self.inc[w] if alive[a]), default = n)
+            new = min(best + 1, n)
+            level[w] = new
+            support[w] = sum(1 for a in self.inc[w] if alive[a] and level[a] == best) if new < n else 0
+            if new == old:
+                continue
+            # Nodes that leaned on w at its old level lose that support,
+            # those one level below its new level gain it
+            self._release(w, old, queue)
+            if new < n:
+                for x in self.out[w]:
+                    if alive[x] and level[x] == new + 1:
+                        support[x] += 1
+            if new >= n:
+                self.covered -= self.weight[w]
+                lost.append(w)
+            elif support[w] == 0:
+                heapq.heappush(queue, (new, w))
+        return lost
+
+    def _release(self, v, old, queue):
+        level, support, alive = self.level, self.support, self.alive
+        if old >= self.n:
+            return
+        for w in self.out[v]:
+            if alive[w] and level[w] == old + 1:
+                support[w] -= 1
+                if support[w] == 0:
+                    heapq.heappush(queue, (level[w], w))
+
+
+# Colors given by main.py to the main warehouse and the opened warehouses,
+# the sources of the supplies
+SOURCE_COLORS = ('yellow', 'green')
+
+
+def source_nodes(network, colors = SOURCE_COLORS):
+    """
+    Node ids of the supply sources of network, identified by their color
+    attribute (main warehouse 160001 and opened warehouses in the networks
+    of main.py).
+    """
+
+    if network.colors is None:
+        return []
+    return [v for v, color in enumerate(network.colors) if color in colors]
+
+
+def directed_curve(network, order, roots = None, removals = None):
+    """
+    Direction-aware robustness curve of network for the removal order (node
+    ids). Besides the weakly connected curve of curve() (one undirected
+    adjacency, built once), tracks the fraction of the n nodes still
+    reachable along directed edges from the roots (default: source_nodes),
+    decrementally. Returns x, y, V as curve() and the reachable fractions
+    with their vulnerability 0.5 - R / n.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    if roots is None:
+        roots = source_nodes(network)
+    x, y, V = curve(network, order, removals)
+    reach = DecrementalReachability(n, network.sources, network.targets, roots)
+    reached = [reach.covered / n]
+    R = 0.0
+    for i in range(1, removals + 1):
+        reach.remove(order[i - 1])
+        R += reach.covered / n
+        reached.append(reach.covered / n)
+    return x, y, V, reached, 0.5 - R / n
+
+
+##############################################
+########### EIGENVECTOR CENTRALITY ###########
+##############################################
+
+# igraph.Graph.eigenvector_centrality runs ARPACK from a new start vector
+# every time: tied nodes get different float noise from run to run (and
+# so a different removal order), and ARPACK sometimes fails on the
+# networks of main.py. Centralities are computed here by power iteration
+# on a sparse matrix, with ARPACK only as an accelerator when it converges
+# slowly, and rounded so that ties go to the first node.
+
+# Convergence tolerance and decimals kept for ranking
+EIGENVECTOR_TOL = 1e-10
+EIGENVECTOR_DECIMALS = 8
+
+# Uniform part added to a start vector, so that no component starts at
+# zero (a leading eigenvector moving to another component would be missed)
+RESTART = 1e-6
+
+
+def eigenvector_matrix(n, sources, targets, directed = True):
+    """
+    Sparse matrix of the eigenvector centrality equation x = M x on n
+    nodes: entry (v, u) is 1 when u -> v is an edge (incoming edges, as
+    igraph on directed graphs), symmetric for undirected graphs. Self
+    loops and duplicate edges are ignored.
+    """
+
+    sources = numpy.asarray(sources, dtype = numpy.int64)
+    targets = numpy.asarray(targets, dtype = numpy.int64)
+    if not directed:
+        sources, targets = numpy.concatenate((sources, targets)), numpy.concatenate((targets, sources))
+    keep = sources != targets
+    matrix = scipy.sparse.csr_matrix((numpy.ones(keep.sum()), (targets[keep], sources[keep])),
+                                     shape = (n, n))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def _acyclic(matrix, alive):
+    """
+    True when the nodes alive span no cycle (no edge at all for undirected
+    graphs): the matrix is nilpotent and has no leading eigenvector.
+    """
+
+    sub = matrix[alive][:, alive]
+    count = scipy.sparse.csgraph.connected_components(sub, directed = True, connection = 'strong',
+                                                      return_labels = False)
+    return count == sub.shape[0]
+
+
+def power_iteration(matrix, x, alive, tol = EIGENVECTOR_TOL, max_iter = 100):
+    """
+    Power iteration for the leading eigenvector of matrix restricted to the
+    nodes alive, from the start vector x. The shift x <- (M + I) x keeps
+    the eigenvectors and avoids oscillations on bipartite or periodic
+    graphs. Vectors are scaled to a maximum of 1. The change c of an
+    iteration shrinks by the convergence rate r, so the distance to the
+    limit is about c r / (1 - r): stops when it is below tol. Returns the
+    vector, the iterations done and whether it converged.
+    """
+
+    x = numpy.where(alive, x, 0.0)
+    previous = None
+    for iteration in range(1, max_iter + 1):
+        y = matrix @ x + x
+        y[~alive] = 0.0
+        top = y.max()
+        if top <= 0:
+            return y, iteration, True
+        y /= top
+        change = numpy.abs(y - x).max()
+        if change == 0:
+            return y, iteration, True
+        if previous is not None and change < tol:
+            rate = change / previous
+            if rate < 1 and change * rate / (1 - rate) < tol:
+                return y, iteration, True
+        previous = change
+        x = y
+    return x, max_iter, False
+
+
+def _arpack(matrix, x, alive, tol, max_iter):
+    """
+    Leading eigenvector of matrix restricted to the nodes alive by ARPACK,
+    started from x, for when power iteration converges too slowly (close
+    leading eigenvalues). If ARPACK fails, power iteration goes on for up
+    to 100 max_iter iterations. Scaled to a maximum of 1.
+    """
+
+    mask = scipy.sparse.diags(alive.astype(float))
+    sub = mask @ matrix @ mask
+    start = numpy.where(alive, x + RESTART, 0.0)
+    try:
+        if (sub != sub.T).nnz == 0:
+            _, vectors = scipy.sparse.linalg.eigsh(sub, k = 1, which = 'LA', v0 = start, tol = tol)
+        else:
+            _, vectors = scipy.sparse.linalg.eigs(sub, k = 1, which = 'LR', v0 = start, tol = tol)
+    except scipy.sparse.linalg.ArpackError:
+        return power_iteration(matrix, x, alive, tol, 100 * max_iter)[0]
+    y = numpy.real(vectors[:, 0])
+    if y.sum() < 0:
+        y = -y
+    y = numpy.where(alive, numpy.maximum(y, 0.0), 0.0)
+    return y / y.max()
+
+
+def leading_eigenvector(matrix, x, alive, tol = EIGENVECTOR_TOL, max_iter = 100):
+    """
+    Leading eigenvector of matrix restricted to the nodes alive, by power
+    iteration from x (plus RESTART), or by ARPACK if it does not converge
+    within max_iter iterations. Returns the vector and the power iterations
+    done.
+    """
+
+    y, iterations, converged = power_iteration(matrix, x + RESTART, alive, tol, max_iter)
+    if not converged:
+        y = _arpack(matrix, y, alive, tol, max_iter)
+    return y, iterations
+
+
+def eigenvector_centrality(matrix, alive = None, x = None, tol = EIGENVECTOR_TOL, max_iter = 100):
+    """
+    Eigenvector centrality (leading eigenvector scaled to a maximum of 1)
+    of the nodes alive (all by default) of the graph of matrix
+    (eigenvector_matrix), starting from x (all ones by default). As igraph,
+    an acyclic graph gives 1 to the sinks (no outgoing edge, so every node
+    of a graph without edges) and 0 elsewhere. Removed nodes get 0.
+    Returns the centralities and the power iterations done.
+    """
+
+    n = matrix.shape[0]
+    if alive is None:
+        alive = numpy.ones(n, dtype = bool)
+    if _acyclic(matrix, alive):
+        outdegree = numpy.asarray(matrix[alive].sum(axis = 0)).ravel()
+        return numpy.where(alive & (outdegree == 0), 1.0, 0.0), 0
+    if x is None:
+        x = numpy.ones(n)
+    return leading_eigenvector(matrix, x, alive, tol, max_iter)
+
+
+def eigenvector_removals(network, removals = None, warm_start = True, tol = EIGENVECTOR_TOL,
+                         max_iter = 100):
+    """
+    Generator of the first removals node ids (n - 1 by default) of the
+    sequential eigenvector attack on network. After each removal the
+    centrality is recomputed from the previous vector restricted to the
+    surviving nodes (warm_start), which is close to the new one, so a few
+    power iterations are enough.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    matrix = eigenvector_matrix(n, network.sources, network.targets, network.directed)
+    alive = numpy.ones(n, dtype = bool)
+    x, _ = eigenvector_centrality(matrix, alive, None, tol, max_iter)
+    for i in range(1, removals + 1):
+        # Rounded as in _eigenvector: ties go to the first node
+        v = int(numpy.argmax(numpy.where(alive, numpy.round(x, EIGENVECTOR_DECIMALS), -numpy.inf)))
+        alive[v] = False
+        yield v
+        if i < removals:
+            x, _ = eigenvector_centrality(matrix, alive, x if warm_start else None, tol, max_iter)
+
+
+##############################################
+######### IN-MEMORY (IGRAPH) STRATEGIES ######
+##############################################
+
+def load_network(infile):
+    """
+    Reads the GML network in infile once, with igraph, into a Network.
+    """
+
+    with warnings.catch_warnings():
+        # igraph warns about the character references of accented labels
+        warnings.simplefilter('ignore', RuntimeWarning)
+        g = igraph.Graph.Read_GML(infile)
+    return Network.from_igraph(g)
+
+
+def as_network(graph, directed = True):
+    """
+    Network of graph, which is either a Network (returned as is), the path
+    of a GML file, a networkx or igraph graph, or a (nodes, edges) pair of
+    node labels and (source, target) label pairs (list or array). directed
+    applies to pairs only.
+    """
+
+    if isinstance(graph, Network):
+        return graph
+    if isinstance(graph, (str, os.PathLike)):
+        return load_network(graph)
+    if isinstance(graph, networkx.Graph):
+        return Network.from_networkx(graph)
+    if isinstance(graph, igraph.Graph):
+        return Network.from_igraph(graph)
+    nodes, edges = graph
+    index = {label: i for i, label in enumerate(nodes)}
+    edges = numpy.array([(index[a], index[b]) for a, b in edges], dtype = numpy.int64).reshape(-1, 2)
+    return Network(nodes, edges[:, 0], edges[:, 1], directed)
+
+
+def as_networkx(graph):
+    """
+    networkx graph of graph (any form accepted by as_network) that the
+    caller may modify: a GML file is read with networkx, a networkx graph
+    is copied.
+    """
+
+    if isinstance(graph, (str, os.PathLike)):
+        return networkx.read_gml(graph)
+    if isinstance(graph, networkx.Graph):
+        return graph.copy()
+    network = as_network(graph)
+    g = networkx.DiGraph() if network.directed else networkx.Graph()
+    labels = network.labels
+    if network.colors is None:
+        g.add_nodes_from(labels)
+    else:
+        g.add_nodes_from((label, {'color': color}) for label, color in zip(labels, network.colors))
+    g.add_edges_from((labels[a], labels[b])
+                     for a, b in zip(network.sources.tolist(), network.targets.tolist()))
+    return g
+
+
+def as_igraph(graph):
+    """
+    igraph graph of graph (any form accepted by as_network) that the caller
+    may modify, with the node labels in the 'label' vertex attribute: a GML
+    file is read with igraph, an igraph graph with labels is copied.
+    """
+
+    if isinstance(graph, (str, os.PathLike)):
+        return igraph.Graph.Read_GML(graph)
+    if isinstance(graph, igraph.Graph) and 'label' in graph.vs.attributes() \
+            and '_nx_name' not in graph.vs.attributes():
+        return graph.copy()
+    network = as_network(graph)
+    g = network.igraph().copy()
+    g.vs['label'] = network.labels
+    return g
+
+
+def _closeness(g):
+    """
+    Closeness on incoming distances with the Wasserman-Faust scaling for
+    disconnected graphs, i.e. networkx.closeness_centrality.
+    """
+
+    n = g.vcount()
+    if n <= 1:
+        return [0.0] * n
+    c = g.closeness(mode = 'in', normalized = True)
+    reach = g.neighborhood_size(order = n, mode = 'in')
+    return [0.0 if value != value else value * (r - 1) / (n - 1)
+            for value, r in zip(c, reach)]
+
+
+def _eigenvector(g):
+    """
+    Eigenvector centrality of the igraph graph g (eigenvector_centrality,
+    with the conventions of igraph), rounded to EIGENVECTOR_DECIMALS.
+    """
+
+    edges = numpy.array(g.get_edgelist(), dtype = numpy.int64).reshape(-1, 2)
+    matrix = eigenvector_matrix(g.vcount(), edges[:, 0], edges[:, 1], g.is_directed())
+    values, _ = eigenvector_centrality(matrix)
+    return numpy.round(values, EIGENVECTOR_DECIMALS)
+
+
+# Centralities computed on igraph graphs, same rankings as the networkx
+# functions used by robustness_analysis.py (eigenvector as igraph's, with
+# a deterministic solver)
+CENTRALITIES = {
+    'degree': lambda g: g.degree(),
+    'betweenness': lambda g: g.betweenness(directed = g.is_directed()),
+    'closeness': _closeness,
+    'eigenvector': _eigenvector,
+}
+
+# Number of removals is n minus this (robustness_analysis.degree stops at n - 2)
+REMOVALS_OFFSET = {'degree': 2}
+
+STRATEGIES = ['degree', 'betweenness', 'closeness', 'eigenvector', 'random']
+
+
+def _ranking(values, ids):
+    """
+    ids sorted by decreasing value, ties in id (node) order.
+    """
+
+    values = numpy.asarray(values, dtype = float)
+    return ids[numpy.lexsort((ids, -values))]
+
+
+def iter_removals(network, strategy, recalculate = False, removals = None, seed = None):
+    """
+    Generator of the first removals node ids removed by strategy
+    ('degree', 'betweenness', 'closeness', 'eigenvector' or 'random') on
+    network. With recalculate, the centrality is recomputed after each
+    removal on the nodes still alive (mask), only when the next node is
+    asked for, so the attack can be stopped at any point.
+    """
+
+    n = network.n
+    ids = numpy.arange(n)
+    if removals is None:
+        removals = n - REMOVALS_OFFSET.get(strategy, 1)
+    if strategy == 'random':
+        order = list(range(n))
+        if seed is None:
+            random.shuffle(order)
+        else:
+            random.Random(seed).shuffle(order)
+        yield from order[:removals]
+        return
+
+    centrality = CENTRALITIES[strategy]
+    l = _ranking(centrality(network.igraph()), ids)
+    if not recalculate:
+        yield from l[:removals].tolist()
+        return
+    if strategy == 'eigenvector':
+        # Warm-started power iteration on the full matrix with the mask
+        yield from eigenvector_removals(network, removals)
+        return
+
+    alive = numpy.ones(n, dtype = bool)
+    for i in range(1, removals + 1):
+        v = int(l[0])
+        alive[v] = False
+        yield v
+        if i < removals:
+            sub, sub_ids = network.igraph(alive)
+            l = _ranking(centrality(sub), sub_ids)
+
+
+def attack_order(network, strategy, recalculate = False, removals = None, seed = None):
+    """
+    Removal order (node ids) of strategy ('degree', 'betweenness',
+    'closeness', 'eigenvector' or 'random') on network. With recalculate,
+    the centrality is recomputed after each removal on the nodes still
+    alive (mask), for the first removals removals.
+    """
+
+    n = network.n
+    if strategy == 'random' or not recalculate:
+        removals = n
+    elif removals is None:
+        removals = n - REMOVALS_OFFSET.get(strategy, 1)
+    order = list(iter_removals(network, strategy, recalculate, removals, seed))
+    removed = set(order)
+    return order + [v for v in range(n) if v not in removed]
+
+
+def attack(network, strategy, recalculate = False, seed = None):
+    """
+    Robustness curve (x, y, V) of strategy on the in-memory network (any
+    form accepted by as_network).
+    """
+
+    network = as_network(network)
+    removals = network.n - REMOVALS_OFFSET.get(strategy, 1)
+    order = attack_order(network, strategy, recalculate, removals, seed)
+    return curve(network, order, removals)
+
+
+def directed_attack(network, strategy, recalculate = False, seed = None, roots = None):
+    """
+    Direction-aware curve (directed_curve) of strategy on the in-memory
+    network (any form accepted by as_network).
+    """
+
+    network = as_network(network)
+    removals = network.n - REMOVALS_OFFSET.get(strategy, 1)
+    order = attack_order(network, strategy, recalculate, removals, seed)
+    return directed_curve(network, order, roots, removals)
+
+
+def run_strategies(network, recalculate = False, strategies = STRATEGIES, seed = None):
+    """
+    Runs every strategy on the same in-memory network (any form accepted by
+    as_network). Returns a dictionary strategy -> (x, y, V).
+    """
+
+    network = as_network(network)
+    return {strategy: attack(network, strategy, recalculate, seed)
+            for strategy in strategies}
+
+
+# Network shared by the pool workers (set once per worker by _init)
+_network = None
+
+
+def _init(network):
+    global _network
+    _network = network
+
+
+def _timed_attack(strategy, recalculate, seed):
+    start = time.perf_counter()
+    result = attack(_network, strategy, recalculate, seed)
+    return result, time.perf_counter() - start
+
+
+def run_parallel(network, recalculate = False, strategies = STRATEGIES, seed = None,
+                 workers = None):
+    """
+    Same as run_strategies, with the strategies computed concurrently over
+    a pool of workers processes (one per strategy by default). Returns the
+    dictionary strategy -> (x, y, V) and the dictionary strategy -> wall
+    time in seconds.
+    """
+
+    network = as_network(network)
+    if workers is None:
+        workers = min(len(strategies), os.cpu_count() or 1)
+    tasks = [(strategy, recalculate, seed) for strategy in strategies]
+    if workers <= 1:
+        _init(network)
+        results = [_timed_attack(*task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers, initializer = _init, initargs = (network,)) as pool:
+            results = pool.starmap(_timed_attack, tasks)
+    curves = {strategy: result for strategy, (result, _) in zip(strategies, results)}
+    timings = {strategy: elapsed for strategy, (_, elapsed) in zip(strategies, results)}
+    return curves, timings
@@ -0,0 +1,143 @@
+"""
+Persisted robustness curves and their renderer. Computing the curves is
+the slow part of robustness_analysis.py; drawing them is not, so the two
+are separated:
+
+    - save_results / load_results store the curves (x, y, V per strategy)
+      in a compressed NPZ file, with the attack parameters as metadata;
+    - result_path names the file after the SHA-256 of the input network
+      and the parameters, so a result is found again for the same network
+      and attack and recomputed when either changes, or when the
+      strategies themselves change (ENGINE_VERSION);
+    - render draws the figure of robustness_analysis.py from the stored
+      curves, with rasterized lines (dense curves stay light in vector
+      output) and a configurable dpi, so restyling needs no recomputation.
+
+Usage: python robustness_results.py <results.npz> <outfile> [dpi]
+"""
+
+import hashlib, json, os, sys
+import numpy, pylab
+
+RESULTS_DIR = 'robustness_results'
+
+# Version of the stored curves, part of every result key: bump it whenever
+# a strategy returns different curves for the same network and parameters
+# (2: deterministic eigenvector centrality and lowest-id degree ties)
+ENGINE_VERSION = 2
+
+# Colors and inset labels of robustness_analysis.py
+COLORS = {'degree': 'b', 'betweenness': 'g', 'closeness': 'r', 'eigenvector': 'c', 'random': 'k'}
+LABELS = {'degree': 'D', 'betweenness': 'B', 'closeness': 'C', 'eigenvector': 'E', 'random': 'R'}
+
+
+def file_hash(path):
+    """
+    SHA-256 of the content of path.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def result_path(digest, results_dir = RESULTS_DIR, **params):
+    """
+    Path of the results of the network with content hash digest for the
+    attack parameters params (JSON serializable), under the current
+    ENGINE_VERSION.
+    """
+
+    params = dict(params, engine_version = ENGINE_VERSION)
+    key = hashlib.sha256(json.dumps(params, sort_keys = True).encode()).hexdigest()
+    return os.path.join(results_dir, f'{digest[:16]}_{key[:16]}.npz')
+
+
+def save_results(path, curves, **meta):
+    """
+    Saves curves ({strategy: (x, y, V)}) and the metadata meta to the NPZ
+    file path (written to a temporary file first, then renamed).
+    """
+
+    arrays = {}
+    for strategy, (x, y, V) in curves.items():
+        arrays[f'{strategy}_x'] = numpy.asarray(x, dtype = float)
+        arrays[f'{strategy}_y'] = numpy.asarray(y, dtype = float)
+        arrays[f'{strategy}_V'] = numpy.float64(V)
+    meta['strategies'] = list(curves)
+    meta['engine_version'] = ENGINE_VERSION
+    arrays['meta'] = numpy.array(json.dumps(meta))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+    tmp = path + '.tmp.npz'
+    numpy.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_results(path):
+    """
+    Curves ({strategy: (x, y, V)}, as lists and a float) and metadata
+    stored by save_results.
+    """
+
+    with numpy.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        curves = {strategy: (data[f'{strategy}_x'].tolist(), data[f'{strategy}_y'].tolist(),
+                             float(data[f'{strategy}_V']))
+                  for strategy in meta['strategies']}
+    return curves, meta
+
+
+def render(curves, outfile, dpi = 500, rasterized = True, format = None):
+    """
+    Figure of robustness_analysis.py: the curves of every strategy with a
+    bar inset of the vulnerabilities. The format is taken from the
+    extension of outfile unless given.
+    """
+
+    pylab.figure(1, dpi = dpi)
+    pylab.xlabel(r"Fraction of vertices removed ($\rho$)")
+    pylab.ylabel(r"Fractional size of largest component ($\sigma$)")
+    for strategy, (x, y, V) in curves.items():
+        pylab.plot(x, y, COLORS[strategy] + "-", alpha = 0.6, linewidth = 2.0,
+                   rasterized = rasterized)
+    pylab.legend(["%s ($V = %4.3f$)" %(strategy.capitalize(), V)
+                  for strategy, (x, y, V) in curves.items()],
+                 loc = "upper right", shadow = False)
+
+    # Inset showing vulnerability values.
+    V = [curve[2] for curve in curves.values()]
+    xlocations = numpy.array(range(len(V))) + 0.2
+    width = 0.2
+    pylab.axes([0.735, 0.45, 0.15, 0.15])
+    pylab.bar(xlocations, V, color = [COLORS[strategy] for strategy in curves],
+              alpha = 0.6, width = width)
+    pylab.yticks([0.0, 0.25, 0.5])
+    pylab.xticks(xlocations + width / 2, [r"$%s$" %(LABELS[strategy]) for strategy in curves])
+    pylab.xlim(0, xlocations[-1] + width * 2)
+    pylab.ylabel(r"$V$")
+
+    pylab.savefig(outfile, format = format)
+    pylab.close(1)
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python robustness_results.py <results.npz> <outfile> [dpi]")
+        sys.exit(0)
+
+    curves, meta = load_results(argv[0])
+    dpi = int(argv[2]) if len(argv) > 2 else 500
+    render(curves, argv[1], dpi)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python robustness_results.py robustness_results/<key>.npz final_output_AA.pdf 300
+# Windows: py robustness_results.py robustness_results/<key>.npz final_output_AA.pdf 300
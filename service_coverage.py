@@ -0,0 +1,130 @@
+"""
+Demand-weighted service coverage. The robustness curves of
+robustness_analysis.py count nodes, so losing Cusco city (119,148 people)
+weighs as much as losing a hamlet. Here the measure is the fraction of the
+population (Pj.csv) still reachable from the main warehouse 160001 along
+the directed links of the solution network (hub -> opened warehouse or
+backup facility -> community), as nodes are removed.
+
+Reachability is maintained decrementally with the Even-Shiloach structure
+of robustness_engine (DecrementalReachability): only the part of the
+network below a removed node is touched, instead of a full BFS per
+removal.
+
+Usage: python service_coverage.py <infile> <outfile> <recalculate> [data_dir]
+
+prints sigma's V and the service vulnerability of every attack strategy,
+and plots the coverage curves.
+"""
+
+import os, sys
+import numpy, pylab
+import pandas as pd
+
+import robustness_engine
+from robustness_engine import DecrementalReachability
+
+# Hub of the solution networks (opt_model.MAIN_WAREHOUSE_ID)
+MAIN_WAREHOUSE_ID = 160001
+
+STRATEGIES = ['degree', 'betweenness', 'closeness', 'random']
+
+
+def population_weights(network, data_dir = 'processed_data'):
+    """
+    Population of every node of network (a robustness_engine.Network):
+    communities are matched by district name with Pj.csv, facilities weigh
+    nothing.
+    """
+
+    communities = pd.read_csv(os.path.join(data_dir, 'Pj.csv'))
+    population = dict(zip(communities['district'].astype(str), communities['population']))
+    return numpy.array([population.get(str(label), 0) for label in network.labels], dtype = float)
+
+
+def roots_of(network, roots = (MAIN_WAREHOUSE_ID,)):
+    """
+    Node ids of the root labels (integers or strings, as read from GML).
+    """
+
+    index = {str(label): i for i, label in enumerate(network.labels)}
+    return [index[str(root)] for root in roots if str(root) in index]
+
+
+def coverage_curve(network, order, weights, roots = (MAIN_WAREHOUSE_ID,), removals = None):
+    """
+    Service coverage of network for the removal order (node ids): returns
+    the fractions of nodes removed, the fractions of the total weight
+    (population) still reachable from the roots, and the service
+    vulnerability 0.5 - R / n, with the arithmetic of the V of
+    robustness_analysis.py.
+    """
+
+    n = network.n
+    if removals is None:
+        removals = n - 1
+    reach = DecrementalReachability(n, network.sources, network.targets,
+                                    roots_of(network, roots), weights)
+    total = float(numpy.sum(weights)) or 1.0
+    x = [0]
+    y = [reach.covered / total]
+    R = 0.0
+    for i in range(1, removals + 1):
+        reach.remove(order[i - 1])
+        x.append(i * 1. / n)
+        R += reach.covered / total
+        y.append(reach.covered / total)
+    return x, y, 0.5 - R / n
+
+
+def attack(network, strategy, weights, recalculate = False, seed = None,
+           roots = (MAIN_WAREHOUSE_ID,)):
+    """
+    Runs strategy on network and returns both measures of the same removal
+    order: {'x', 'sigma', 'V', 'coverage', 'V_service'}.
+    """
+
+    removals = network.n - robustness_engine.REMOVALS_OFFSET.get(strategy, 1)
+    order = robustness_engine.attack_order(network, strategy, recalculate, removals, seed)
+    x, y, V = robustness_engine.curve(network, order, removals)
+    _, coverage, V_service = coverage_curve(network, order, weights, roots, removals)
+    return {'x': x, 'sigma': y, 'V': V, 'coverage': coverage, 'V_service': V_service}
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 3:
+        print("python service_coverage.py <infile> <outfile> <recalculate> [data_dir]")
+        sys.exit(0)
+
+    infile, outfile = argv[0], argv[1]
+    recalculate = argv[2] == "True"
+    data_dir = argv[3] if len(argv) > 3 else 'processed_data'
+
+    network = robustness_engine.load_network(infile)
+    weights = population_weights(network, data_dir)
+    results = {strategy: attack(network, strategy, weights, recalculate)
+               for strategy in STRATEGIES}
+    for strategy, result in results.items():
+        print(f"{strategy}: V = {result['V']:.4f}, service V = {result['V_service']:.4f}")
+
+    pylab.figure(1, dpi = 500)
+    pylab.xlabel(r"Fraction of vertices removed ($\rho$)")
+    pylab.ylabel(r"Fraction of population served")
+    for strategy, style in zip(STRATEGIES, ["b-", "g-", "r-", "k-"]):
+        pylab.plot(results[strategy]['x'], results[strategy]['coverage'], style,
+                   alpha = 0.6, linewidth = 2.0)
+    pylab.legend(["%s ($V_s = %4.3f$)" %(strategy.capitalize(), results[strategy]['V_service'])
+                  for strategy in STRATEGIES], loc = "upper right", shadow = False)
+    pylab.savefig(outfile, format = "pdf")
+    pylab.close(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python service_coverage.py final_network_MAIN.gml final_output_service.pdf True
+# Windows: py service_coverage.py final_network_MAIN.gml final_output_service.pdf True
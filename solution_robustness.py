@@ -0,0 +1,109 @@
+"""
+Optimization and robustness analysis in one process. main.py writes the
+solution networks to GML files that robustness_analysis.py parses again;
+here the solution network built by opt_model.solution_network goes straight
+to the robustness engine (robustness_engine.as_network accepts the
+networkx graph), so the optimize -> analyse loop has no file I/O and the
+node labels keep their types (the main warehouse stays 160001).
+
+Usage: python solution_robustness.py <outfile> <recalculate> [provinces] [data_dir] [events] [seed]
+
+where provinces is a comma separated list (default Cusco,Anta,Calca,Urubamba).
+With events > 0 (default 0), the model also pays the expected cost of the
+demand whose warehouse fails, with the failure probabilities of that many
+sampled earthquakes (ground_motion.failure_prob, events sampled with seed,
+default 0).
+outfile gets the curves of the network with backup facilities
+(final_network_MAIN.gml in main.py); the V of the network without them
+(final_network_MAIN_OnlyWarehouses.gml) is printed for comparison.
+"""
+
+import sys
+from gurobipy import GRB
+
+import ground_motion, robustness_engine, robustness_results
+from opt_model import load_data, build_model, optimize_model, apply_tuned_params, extract_solution, solution_network
+
+STRATEGIES = ['degree', 'betweenness', 'closeness', 'random']
+
+
+def solve(data, alpha = 0.5, max_backup = 3, linking = 'strong', output = True,
+          failure_prob = None, failure_cost = None):
+    """
+    Builds and solves the model of main.py on data (opt_model.load_data),
+    with the expected failure cost of build_model if failure_prob is given.
+    Returns the solution (opt_model.extract_solution), with its objective
+    value under 'objective'.
+    """
+
+    model, x, z, y, w = build_model(data, alpha, max_backup, linking = linking,
+                                    failure_prob = failure_prob, failure_cost = failure_cost)
+    model.Params.OutputFlag = int(output)
+    apply_tuned_params(model, len(data['I']), len(data['C']))
+    optimize_model(model)
+    if model.SolCount == 0:
+        raise RuntimeError(f"No solution found (status {model.status})")
+    if model.status != GRB.OPTIMAL:
+        print(f"Warning: solution not proven optimal (status {model.status})")
+    values = {name: model.getAttr('X', var) for name, var in zip('xzyw', (x, z, y, w))}
+    objective = model.ObjVal
+    model.dispose()
+    solution = extract_solution(data, values)
+    solution['objective'] = objective
+    return solution
+
+
+def analyse(data, solution, backups = True, recalculate = False, strategies = STRATEGIES,
+            seed = None, workers = None):
+    """
+    Robustness curves of the solution network (opt_model.solution_network)
+    without writing it. Returns the networkx graph, the dictionary strategy
+    -> (x, y, V) and the dictionary strategy -> wall time in seconds.
+    """
+
+    G = solution_network(data, solution, backups)
+    curves, timings = robustness_engine.run_parallel(G, recalculate, strategies, seed, workers)
+    return G, curves, timings
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python solution_robustness.py <outfile> <recalculate> [provinces] [data_dir] [events] [seed]")
+        sys.exit(0)
+
+    outfile = argv[0]
+    recalculate = argv[1] == "True"
+    provinces = argv[2].split(',') if len(argv) > 2 else ['Cusco', 'Anta', 'Calca', 'Urubamba']
+    data_dir = argv[3] if len(argv) > 3 else 'processed_data'
+    events = int(argv[4]) if len(argv) > 4 else 0
+    seed = int(argv[5]) if len(argv) > 5 else 0
+
+    data = load_data(provinces, data_dir)
+    failure_prob = None
+    if events > 0:
+        failure_prob = ground_motion.failure_prob(data, ground_motion.sample_events(events, seed))
+    solution = solve(data, failure_prob = failure_prob)
+    print(f"Objective: {solution['objective']:.2f}")
+    print(f"Opened warehouses: {solution['main_warehouses']}")
+    print(f"Opened backup facilities: {solution['backup_facilities']}")
+
+    for backups in (True, False):
+        G, curves, timings = analyse(data, solution, backups, recalculate)
+        name = "with backups" if backups else "warehouses only"
+        print(f"Network {name}: {G.number_of_nodes()} nodes, {G.number_of_edges()} links")
+        for strategy, (x, y, V) in curves.items():
+            print(f"  {strategy}: V = {V:.4f} ({timings[strategy]:.3f}s)")
+        if backups:
+            robustness_results.render(curves, outfile)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python solution_robustness.py final_output_AA.pdf True
+# Mac: python solution_robustness.py final_output_AA.pdf True Cusco,Anta,Calca,Urubamba processed_data 20000
+# Windows: py solution_robustness.py final_output_AA.pdf True
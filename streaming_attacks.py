@@ -0,0 +1,235 @@
+"""
+Streaming attack curves. robustness_analysis.py runs every attack to n - 1
+removals and returns the lists at the end, while on large networks only the
+beginning of the curve matters (until the giant component falls below,
+say, sigma = 0.1). Here the attacks are generators of (rho, sigma) points,
+produced as the nodes are removed, that stop early on a sigma threshold or
+a time budget, with an estimate of V from the points computed so far.
+
+The largest component is followed forward: every node keeps a component
+label, and removing a node starts one search from each of its surviving
+neighbours over the undirected adjacency, run in lockstep. Searches that
+meet belong to the same piece and are merged; as soon as a single search
+is still running, the pieces already exhausted are the ones split off and
+get new labels, while the last one keeps the old label without being
+explored further. A removal therefore costs about d times the size (with
+links) of the pieces split off, d being the degree of the removed node,
+instead of the size of the whole component; a node that is not a cut
+vertex costs only until the searches meet. The pieces split off are at
+most as large as the piece kept (up to d), so each node is relabelled
+O(log n) times over the attack. Component sizes are kept in a histogram,
+so the largest size only moves down, in amortized constant time.
+
+Usage: python streaming_attacks.py <infile> <strategy> <recalculate> [sigma_min] [time_budget]
+"""
+
+import sys, time
+
+import robustness_engine
+from robustness_engine import REMOVALS_OFFSET, iter_removals
+
+
+class ComponentTracker:
+    """
+    Weakly connected components of network (a robustness_engine.Network)
+    under node removals. largest is the size of the largest component.
+    """
+
+    def __init__(self, network):
+        n = network.n
+        self.adjacency = network.adjacency()
+        self.alive = [True] * n
+        self.label = [-1] * n
+        self.size = {}
+        for v in range(n):
+            if self.label[v] == -1:
+                self.size[v] = self._explore(v, v)
+        self.histogram = [0] * (n + 1)
+        for size in self.size.values():
+            self.histogram[size] += 1
+        self.largest = max(self.size.values(), default = 0)
+        self._next = n
+
+    def _explore(self, start, label):
+        """
+        Labels the alive nodes connected to start with label. Returns
+        their number.
+        """
+
+        adjacency, alive, node_label = self.adjacency, self.alive, self.label
+        node_label[start] = label
+        stack, count = [start], 1
+        while stack:
+            v = stack.pop()
+            for u in adjacency[v]:
+                if alive[u] and node_label[u] != label:
+                    node_label[u] = label
+                    stack.append(u)
+                    count += 1
+        return count
+
+    def _resize(self, label, size):
+        old = self.size.pop(label, 0)
+        if old:
+            self.histogram[old] -= 1
+        if size:
+            self.size[label] = size
+            self.histogram[size] += 1
+
+    def _relabel(self, nodes):
+        label = self._next
+        self._next += 1
+        for v in nodes:
+            self.label[v] = label
+        self._resize(label, len(nodes))
+
+    def remove(self, v):
+        """
+        Removes node v: searches from its surviving neighbours run in
+        lockstep until at most one is unfinished, the exhausted pieces
+        getting new labels.
+        """
+
+        adjacency, alive = self.adjacency, self.alive
+        if not alive[v]:
+            return
+        alive[v] = False
+        label = self.label[v]
+        self.label[v] = -1
+        remaining = self.size[label] - 1
+        starts = list(dict.fromkeys(u for u in adjacency[v] if alive[u]))
+
+        if len(starts) > 1:
+            # Search i owns the nodes it reached; merged searches point to
+            # the search that absorbed them (root)
+            owner = {u: i for i, u in enumerate(starts)}
+            root = list(range(len(starts)))
+            stacks = [[u] for u in starts]
+            pieces = [[u] for u in starts]
+            running = set(range(len(starts)))
+
+            def find(i):
+                while root[i] != i:
+                    root[i] = root[root[i]]
+                    i = root[i]
+                return i
+
+            while len(running) > 1:
+                for i in list(running):
+                    if i not in running:
+                        continue
+                    stack = stacks[i]
+                    x = stack.pop()
+                    for w in adjacency[x]:
+                        if not alive[w]:
+                            continue
+                        j = owner.get(w)
+                        if j is None:
+                            owner[w] = i
+                            stack.append(w)
+                            pieces[i].append(w)
+                            continue
+                        j = find(j)
+                        if j != i:
+                            # Same piece: absorb search j (smaller lists into larger)
+                            if len(pieces[j]) > len(pieces[i]):
+                                pieces[i], pieces[j] = pieces[j], pieces[i]
+                            if len(stacks[j]) > len(stack):
+                                stacks[i], stacks[j] = stacks[j], stack
+                                stack = stacks[i]
+                            pieces[i].extend(pieces[j])
+                            stack.extend(stacks[j])
+                            pieces[j] = stacks[j] = None
+                            root[j] = i
+                            running.discard(j)
+                    if not stack:
+                        running.discard(i)
+
+            finished = [i for i in range(len(starts))
+                        if root[i] == i and i not in running]
+            if not running:
+                # Every piece explored: the largest keeps the label
+                finished.remove(max(finished, key = lambda i: len(pieces[i])))
+            for i in finished:
+                self._relabel(pieces[i])
+                remaining -= len(pieces[i])
+
+        self._resize(label, remaining)
+        while self.largest > 0 and self.histogram[self.largest] == 0:
+            self.largest -= 1
+
+
+def stream_attack(network, strategy, recalculate = False, seed = None, sigma_min = None,
+                  time_budget = None):
+    """
+    Generator of the (rho, sigma) points of the attack strategy on network
+    (as robustness_engine.attack), starting with (0, sigma_0). Stops after
+    the first point with sigma below sigma_min, or when time_budget
+    seconds have elapsed.
+    """
+
+    start = time.perf_counter()
+    n = network.n
+    tracker = ComponentTracker(network)
+    yield 0.0, tracker.largest * 1. / n
+    removals = n - REMOVALS_OFFSET.get(strategy, 1)
+    for i, v in enumerate(iter_removals(network, strategy, recalculate, removals, seed), 1):
+        tracker.remove(v)
+        sigma = tracker.largest * 1. / n
+        yield i * 1. / n, sigma
+        if sigma_min is not None and sigma < sigma_min:
+            return
+        if time_budget is not None and time.perf_counter() - start > time_budget:
+            return
+
+
+def partial_v(points, n, removals = None):
+    """
+    Estimate of V from the first points (rho, sigma) of a curve of n nodes
+    with removals removals (n - 1 by default). sigma never increases and is
+    at most the fraction of nodes left, so the missing points lie between
+    0 and min(sigma_last, (n - i) / n): returns the midpoint estimate and
+    the bounds (estimate, low, high) of V. They are equal for a complete
+    curve.
+    """
+
+    if removals is None:
+        removals = n - 1
+    R = sum(sigma for _, sigma in points[1:]) / n
+    done = len(points) - 1
+    sigma_last = points[-1][1]
+    tail = sum(min(sigma_last, (n - i) * 1. / n) for i in range(done + 1, removals + 1)) / n
+    low, high = 0.5 - R - tail, 0.5 - R
+    return (low + high) / 2, low, high
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 3:
+        print("python streaming_attacks.py <infile> <strategy> <recalculate> [sigma_min] [time_budget]")
+        sys.exit(0)
+
+    infile, strategy = argv[0], argv[1]
+    recalculate = argv[2] == "True"
+    sigma_min = float(argv[3]) if len(argv) > 3 else 0.1
+    time_budget = float(argv[4]) if len(argv) > 4 else None
+
+    network = robustness_engine.load_network(infile)
+    points = []
+    for rho, sigma in stream_attack(network, strategy, recalculate, sigma_min = sigma_min,
+                                    time_budget = time_budget):
+        points.append((rho, sigma))
+        print(f"rho = {rho:.4f}  sigma = {sigma:.4f}")
+    removals = network.n - REMOVALS_OFFSET.get(strategy, 1)
+    V, low, high = partial_v(points, network.n, removals)
+    print(f"{len(points) - 1} of {removals} removals: V ~ {V:.4f} (between {low:.4f} and {high:.4f})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python streaming_attacks.py final_network_MAIN.gml betweenness True 0.1 60
+# Windows: py streaming_attacks.py final_network_MAIN.gml betweenness True 0.1 60
@@ -0,0 +1,196 @@
+"""
+Seeded generator of synthetic instances of arbitrary size, for stress tests
+and scaling benchmarks (main_syn.py only has a 3-community toy).
+
+Communities are grouped in provinces (clusters) around the Cusco region,
+with lognormal populations and one urban core per province. Candidate main
+warehouses and backup facilities are placed near populated communities,
+with opening costs resampled from Ci.csv and Rk.csv. Distances go through
+the same harversine pipeline as matrix_data_generation.py, and the output
+directory holds Pj.csv, Ci.csv, Rk.csv, dji_matrix.csv and bik_matrix.csv
+in the exact format main.py reads (opt_model.load_data(None, out_dir)).
+
+Usage: python synthetic_data_generation.py <n_communities> <out_dir> [seed]
+"""
+
+import math, os, sys
+import numpy as np
+import pandas as pd
+
+from geo_utils import distance_matrix
+
+# Bounding box of the communities in Pj.csv (decimal degrees)
+LAT_RANGE = (-15.30, -11.72)
+LON_RANGE = (-73.94, -70.75)
+
+# Log-population of the communities in Pj.csv (mean and std)
+LOG_POPULATION = (8.74, 1.0)
+
+# Spread of the communities around their province center (degrees)
+PROVINCE_SPREAD = 0.17
+
+# Main warehouse (hub) id and its opening cost in Ci.csv
+MAIN_WAREHOUSE_ID = 160001
+
+# Sizes of the scaling benchmark
+SCALING_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+def _costs(data_dir, file, default):
+    """
+    Empirical opening costs of a facility file, excluding the main hub.
+    """
+
+    path = os.path.join(data_dir, file)
+    if not os.path.exists(path):
+        return np.array(default, dtype = float)
+    df = pd.read_csv(path)
+    return df.loc[df['wh_id'] != MAIN_WAREHOUSE_ID, 'cost'].to_numpy(dtype = float)
+
+
+def generate_instance(n_communities, n_warehouses = None, n_backups = None,
+                      n_provinces = None, seed = 0, data_dir = 'processed_data'):
+    """
+    Generates a synthetic instance with n_communities communities. By
+    default the number of provinces, candidate warehouses and backup
+    facilities grow with the square root of n_communities, close to the
+    proportions of the Cusco data (116 communities, 13 provinces, 14
+    warehouses, 16 backups). Returns the communities, warehouses and
+    backups dataframes (Pj, Ci and Rk layout).
+    """
+
+    rng = np.random.default_rng(seed)
+    root = math.sqrt(n_communities)
+    if n_provinces is None:
+        n_provinces = max(1, round(1.2 * root))
+    if n_warehouses is None:
+        n_warehouses = max(2, round(1.3 * root))
+    if n_backups is None:
+        n_backups = max(1, round(1.5 * root))
+
+    # Provinces: centers inside the bounding box, uneven sizes
+    centers_lat = rng.uniform(*LAT_RANGE, n_provinces)
+    centers_lon = rng.uniform(*LON_RANGE, n_provinces)
+    weights = rng.dirichlet(np.full(n_provinces, 2.0))
+    province = np.sort(rng.choice(n_provinces, n_communities, p = weights))
+
+    # Communities: scattered around their province center
+    spread = PROVINCE_SPREAD * rng.uniform(0.5, 1.5, n_provinces)
+    latitude = centers_lat[province] + rng.normal(0, 1, n_communities) * spread[province]
+    longitude = centers_lon[province] + rng.normal(0, 1, n_communities) * spread[province]
+    population = np.exp(rng.normal(*LOG_POPULATION, n_communities))
+
+    # One urban core per province, the first province hosting the capital
+    cores = np.unique(np.searchsorted(province, np.arange(n_provinces)))
+    cores = cores[cores < n_communities]
+    latitude[cores] = centers_lat[province[cores]]
+    longitude[cores] = centers_lon[province[cores]]
+    population[cores] *= rng.uniform(5, 15, len(cores))
+    population = np.maximum(np.round(population), 1).astype(int)
+
+    communities_df = pd.DataFrame({
+        'location_id': np.arange(1, n_communities + 1) + 80000,
+        'province': [f'Province_{p + 1:03d}' for p in province],
+        'district': [f'Community_{j + 1:06d}' for j in range(n_communities)],
+        'latitude': latitude,
+        'longitude': longitude,
+        'population': population,
+    })
+
+    # Candidate sites near populated communities (population-weighted)
+    def sites(n):
+        picked = rng.choice(n_communities, n, p = population / population.sum())
+        return (latitude[picked] + rng.normal(0, 0.02, n),
+                longitude[picked] + rng.normal(0, 0.02, n))
+
+    main_costs = _costs(data_dir, 'Ci.csv', [138000, 155100, 188500, 205550, 220000])
+    backup_costs = _costs(data_dir, 'Rk.csv', [20500])
+
+    wh_lat, wh_lon = sites(n_warehouses)
+    wh_cost = rng.choice(main_costs, n_warehouses)
+    # The hub sits at the capital, as 160001 in Ci.csv
+    wh_lat[0], wh_lon[0], wh_cost[0] = latitude[0], longitude[0], 1
+    warehouses_df = pd.DataFrame({
+        'wh_id': MAIN_WAREHOUSE_ID + np.arange(n_warehouses),
+        'longitude': wh_lon,
+        'latitude': wh_lat,
+        'cost': wh_cost.astype(int),
+    })
+
+    bk_lat, bk_lon = sites(n_backups)
+    backup_df = pd.DataFrame({
+        'wh_id': MAIN_WAREHOUSE_ID + n_warehouses + np.arange(n_backups),
+        'longitude': bk_lon,
+        'latitude': bk_lat,
+        'cost': rng.choice(backup_costs, n_backups).astype(int),
+    })
+
+    return communities_df, warehouses_df, backup_df
+
+
+def write_instance(communities_df, warehouses_df, backup_df, out_dir, chunk_size = 256):
+    """
+    Writes the instance and its distance matrices to out_dir, in the layout
+    of processed_data. dji (all facilities x communities) and bik (all
+    facilities x all facilities) are computed and written in chunks of
+    facility rows to bound memory on large instances.
+    """
+
+    os.makedirs(out_dir, exist_ok = True)
+    communities_df.to_csv(os.path.join(out_dir, 'Pj.csv'), index = False)
+    warehouses_df.to_csv(os.path.join(out_dir, 'Ci.csv'), index = False)
+    backup_df.to_csv(os.path.join(out_dir, 'Rk.csv'), index = False)
+
+    # As in matrix_data_generation.py, rows cover every facility
+    wh_df = pd.concat([warehouses_df, backup_df], ignore_index = True)
+
+    for file, columns, col_lat, col_lon in (
+            ('dji_matrix.csv', communities_df['district'],
+             communities_df['latitude'], communities_df['longitude']),
+            ('bik_matrix.csv', wh_df['wh_id'], wh_df['latitude'], wh_df['longitude'])):
+        path = os.path.join(out_dir, file)
+        for start in range(0, len(wh_df), chunk_size):
+            rows = wh_df.iloc[start:start + chunk_size]
+            matrix = pd.DataFrame(
+                distance_matrix(rows['latitude'], rows['longitude'], col_lat, col_lon),
+                index = pd.Index(rows['wh_id'], name = 'wh_id'), columns = columns)
+            matrix.to_csv(path, mode = 'w' if start == 0 else 'a', header = start == 0)
+
+
+def generate_suite(sizes, out_root, seed = 0):
+    """
+    Generates one instance per size under out_root/<size>. Returns the
+    list of (size, directory).
+    """
+
+    suite = []
+    for size in sizes:
+        out_dir = os.path.join(out_root, str(size))
+        write_instance(*generate_instance(size, seed = seed), out_dir)
+        suite.append((size, out_dir))
+    return suite
+
+
+def main(argv):
+    """
+    Entry point.
+    """
+
+    if len(argv) < 2:
+        print("python synthetic_data_generation.py <n_communities> <out_dir> [seed]")
+        sys.exit(0)
+
+    n_communities = int(argv[0])
+    out_dir = argv[1]
+    seed = int(argv[2]) if len(argv) > 2 else 0
+    communities_df, warehouses_df, backup_df = generate_instance(n_communities, seed = seed)
+    write_instance(communities_df, warehouses_df, backup_df, out_dir)
+    print(f'{n_communities} communities, {len(warehouses_df)} warehouses, '
+          f'{len(backup_df)} backups written to {out_dir}')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
+
+# Mac: python synthetic_data_generation.py 1000 synthetic_data/1000 42
+# Windows: py synthetic_data_generation.py 1000 synthetic_data/1000 42
@@ -0,0 +1,44 @@
+"""
+Tests of random_failures.py: the batched Newman-Ziff site percolation
+against the reverse union-find of robustness_engine, on small random
+directed graphs.
+"""
+
+import networkx, numpy, pytest
+
+import random_failures, robustness_engine
+
+SEEDS = range(20)
+
+
+def random_graph(seed, n = 30, p = 0.08):
+    return networkx.gnp_random_graph(n, p, seed = seed, directed = True)
+
+
+def test_removal_sizes_match_engine():
+    for seed in SEEDS:
+        network = robustness_engine.as_network(random_graph(seed))
+        rng = numpy.random.default_rng(seed)
+        orders = numpy.array([rng.permutation(network.n) for _ in range(8)])
+        sizes = random_failures.removal_sizes(network, orders)
+        for order, row in zip(orders, sizes):
+            assert row.tolist() == robustness_engine.largest_component_sizes(network, order.tolist())
+
+
+def test_site_percolation_ends_at_largest_component():
+    network = robustness_engine.as_network(random_graph(0))
+    sizes = random_failures.site_percolation(network, [numpy.arange(network.n)])[0]
+    assert sizes[0] == 0 and sizes[1] == 1
+    assert (numpy.diff(sizes) >= 0).all()
+    assert sizes[-1] == robustness_engine.largest_component_sizes(network, list(range(network.n)))[0]
+
+
+def test_rand_matches_engine(tmp_path):
+    for seed in SEEDS:
+        infile = str(tmp_path / f'network_{seed}.gml')
+        networkx.write_gml(random_graph(seed), infile)
+        x, y, V = random_failures.rand(infile, seed)
+        x_engine, y_engine, V_engine = robustness_engine.rand(infile, seed)
+        assert numpy.allclose(x, x_engine)
+        assert numpy.allclose(y, y_engine)
+        assert V == pytest.approx(V_engine)
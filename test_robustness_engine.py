@@ -0,0 +1,61 @@
+"""
+Tests of robustness_engine.py against the original networkx loops of
+robustness_analysis.py, on small random directed graphs.
+"""
+
+import random
+
+import networkx, numpy, pytest
+
+import robustness_analysis, robustness_engine
+
+SEEDS = range(20)
+
+
+def random_graph(seed, n = 25, p = 0.12):
+    return networkx.gnp_random_graph(n, p, seed = seed, directed = True)
+
+
+@pytest.mark.parametrize('recalculate', [False, True])
+@pytest.mark.parametrize('strategy', ['degree', 'betweenness', 'closeness'])
+def test_attack_matches_robustness_analysis(strategy, recalculate):
+    for seed in SEEDS:
+        g = random_graph(seed)
+        x, y, V = getattr(robustness_analysis, strategy)(g.copy(), recalculate)
+        x_engine, y_engine, V_engine = robustness_engine.attack(g, strategy, recalculate)
+        assert numpy.allclose(x_engine, x)
+        assert numpy.allclose(y_engine, y)
+        assert V_engine == pytest.approx(V)
+
+
+def test_random_attack_matches_robustness_analysis():
+    for seed in SEEDS:
+        g = random_graph(seed)
+        random.seed(seed)
+        x, y, V = robustness_analysis.rand(g.copy())
+        random.seed(seed)
+        x_engine, y_engine, V_engine = robustness_engine.attack(g, 'random')
+        assert numpy.allclose(y_engine, y)
+        assert V_engine == pytest.approx(V)
+
+
+def test_decremental_reachability_matches_bfs():
+    for seed in SEEDS:
+        g = random_graph(seed, n = 40, p = 0.06)
+        n = g.number_of_nodes()
+        rng = numpy.random.default_rng(seed)
+        edges = numpy.array(list(g.edges()), dtype = numpy.int64).reshape(-1, 2)
+        roots = rng.choice(n, 3, replace = False).tolist()
+        weights = rng.random(n)
+        reach = robustness_engine.DecrementalReachability(n, edges[:, 0], edges[:, 1], roots, weights)
+        for v in rng.permutation(n).tolist():
+            before = {w for w in range(n) if reach.reachable(w)}
+            lost = reach.remove(v)
+            g.remove_node(v)
+            alive_roots = [r for r in roots if r in g]
+            levels = networkx.multi_source_dijkstra_path_length(g, alive_roots) if alive_roots else {}
+            reached = set(levels)
+            assert {w for w in range(n) if reach.reachable(w)} == reached
+            assert set(lost) == before - reached
+            assert all(reach.level[w] == d for w, d in levels.items())
+            assert reach.covered == pytest.approx(weights[sorted(reached)].sum())
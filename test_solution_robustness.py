@@ -0,0 +1,27 @@
+"""
+Tests of solution_robustness.py: the failure-aware model of
+opt_model.build_model on the default provinces.
+"""
+
+import os
+
+import ground_motion
+from opt_model import load_data
+from solution_robustness import solve
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processed_data')
+
+
+def test_failure_prob_changes_objective():
+    data = load_data(['Cusco', 'Anta', 'Calca', 'Urubamba'], DATA_DIR)
+    failure_prob = ground_motion.failure_prob(data, ground_motion.sample_events(2000, 0))
+    assert set(data['I']) <= set(failure_prob)
+    assert all(0 <= p <= 1 for p in failure_prob.values())
+
+    plain = solve(data, output = False)
+    aware = solve(data, output = False, failure_prob = failure_prob)
+    assert aware['objective'] > plain['objective']
+
+    # No failures: same objective as the plain model
+    zero = solve(data, output = False, failure_prob = dict.fromkeys(failure_prob, 0.0))
+    assert abs(zero['objective'] - plain['objective']) <= 1e-6 * max(1.0, abs(plain['objective']))
@@ -0,0 +1,46 @@
+"""
+Tests of streaming_attacks.py: the forward component tracker against the
+connected components recomputed after every removal, on small random
+directed graphs.
+"""
+
+import networkx, numpy, pytest
+
+import robustness_engine
+from streaming_attacks import ComponentTracker, partial_v, stream_attack
+
+SEEDS = range(20)
+
+
+def random_graph(seed, n = 40, p = 0.06):
+    return networkx.gnp_random_graph(n, p, seed = seed, directed = True)
+
+
+def test_component_tracker_matches_connected_components():
+    for seed in SEEDS:
+        g = random_graph(seed)
+        network = robustness_engine.as_network(g)
+        tracker = ComponentTracker(network)
+        h = g.to_undirected()
+        for v in numpy.random.default_rng(seed).permutation(network.n).tolist():
+            tracker.remove(v)
+            h.remove_node(v)
+            components = list(networkx.connected_components(h))
+            assert tracker.largest == max(map(len, components), default = 0)
+            labels = [{tracker.label[u] for u in component} for component in components]
+            assert all(len(label) == 1 for label in labels)
+            assert len(set.union(set(), *labels)) == len(components)
+            for component, (label,) in zip(components, labels):
+                assert tracker.size[label] == len(component)
+
+
+@pytest.mark.parametrize('strategy', ['degree', 'betweenness', 'random'])
+def test_stream_attack_matches_attack(strategy):
+    for seed in SEEDS:
+        network = robustness_engine.as_network(random_graph(seed))
+        x, y, V = robustness_engine.attack(network, strategy, True, seed)
+        points = list(stream_attack(network, strategy, True, seed))
+        assert numpy.allclose([rho for rho, _ in points], x)
+        assert numpy.allclose([sigma for _, sigma in points], y)
+        estimate, low, high = partial_v(points, network.n, len(points) - 1)
+        assert estimate == pytest.approx(V) and low == pytest.approx(high)